@@ -0,0 +1,52 @@
+from logging.config import fileConfig
+
+from alembic import context
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, pool
+
+from app.core.config import settings
+from app.core.database import Base, SCHEMA_REVISION
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+head = ScriptDirectory.from_config(config).get_current_head()
+if head != SCHEMA_REVISION:
+    raise RuntimeError(
+        f"SCHEMA_REVISION in app/core/database.py is {SCHEMA_REVISION!r} but the "
+        f"newest migration is {head!r}: update it together with the migration"
+    )
+
+def _options(url: str) -> dict:
+    sqlite = url.startswith("sqlite")
+    return {
+        "target_metadata": target_metadata,
+        # SQLite cannot ALTER most things in place; batch mode copies the table
+        "render_as_batch": sqlite,
+        # SQLite reflects UUID columns as NUMERIC, which autogenerate would
+        # report as a change on every run
+        "compare_type": not sqlite,
+    }
+
+def run_migrations_offline() -> None:
+    """Emit the SQL instead of running it (alembic upgrade head --sql)"""
+    context.configure(url=settings.DATABASE_URL, literal_binds=True, **_options(settings.DATABASE_URL))
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    engine = create_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        context.configure(connection=connection, **_options(settings.DATABASE_URL))
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
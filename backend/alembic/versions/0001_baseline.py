@@ -0,0 +1,240 @@
+"""Baseline: the schema as the app's create_all built it before migrations
+
+Databases created by that create_all at startup already have exactly
+this: mark them with `alembic stamp 0001` and then run
+`alembic upgrade head`. Tables and constraints added since are created
+by the later revisions.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+ENUM_TYPES = ["metodopago", "tipomovimiento", "estadocaja", "rolusuario"]
+
+
+def upgrade() -> None:
+    op.create_table('farmacias',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('nombre', sa.String(length=200), nullable=False),
+    sa.Column('nit', sa.String(length=20), nullable=False),
+    sa.Column('direccion', sa.String(length=500), nullable=True),
+    sa.Column('telefono', sa.String(length=20), nullable=True),
+    sa.Column('email', sa.String(length=100), nullable=True),
+    sa.Column('registro_sanitario', sa.String(length=100), nullable=True),
+    sa.Column('configuracion', sa.JSON(), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nit')
+    )
+    op.create_table('clientes',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('farmacia_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('nombre', sa.String(length=200), nullable=False),
+    sa.Column('nit_dui', sa.String(length=20), nullable=True),
+    sa.Column('telefono', sa.String(length=20), nullable=True),
+    sa.Column('email', sa.String(length=100), nullable=True),
+    sa.Column('direccion', sa.String(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['farmacia_id'], ['farmacias.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('proveedores',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('farmacia_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('nombre', sa.String(length=200), nullable=False),
+    sa.Column('nit', sa.String(length=20), nullable=True),
+    sa.Column('direccion', sa.String(length=500), nullable=True),
+    sa.Column('telefono', sa.String(length=20), nullable=True),
+    sa.Column('email', sa.String(length=100), nullable=True),
+    sa.Column('contacto', sa.String(length=200), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['farmacia_id'], ['farmacias.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('usuarios',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('farmacia_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('nombre_completo', sa.String(length=200), nullable=False),
+    sa.Column('rol', sa.Enum('ADMINISTRADOR', 'FARMACEUTICO', 'CAJERO', name='rolusuario'), nullable=False),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.Column('ultimo_acceso', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['farmacia_id'], ['farmacias.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_usuarios_email'), 'usuarios', ['email'], unique=True)
+    op.create_index(op.f('ix_usuarios_username'), 'usuarios', ['username'], unique=True)
+    op.create_table('auditoria',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('farmacia_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('usuario_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('tabla', sa.String(length=100), nullable=False),
+    sa.Column('accion', sa.String(length=20), nullable=False),
+    sa.Column('datos_anteriores', sa.JSON(), nullable=True),
+    sa.Column('datos_nuevos', sa.JSON(), nullable=True),
+    sa.Column('ip_address', sa.String(length=50), nullable=True),
+    sa.Column('user_agent', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['farmacia_id'], ['farmacias.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_auditoria_created_at'), 'auditoria', ['created_at'], unique=False)
+    op.create_index(op.f('ix_auditoria_farmacia_id'), 'auditoria', ['farmacia_id'], unique=False)
+    op.create_index(op.f('ix_auditoria_usuario_id'), 'auditoria', ['usuario_id'], unique=False)
+    op.create_table('cajas',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('farmacia_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('usuario_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('monto_inicial', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('monto_final', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('monto_esperado', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('diferencia', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('fecha_apertura', sa.DateTime(), nullable=True),
+    sa.Column('fecha_cierre', sa.DateTime(), nullable=True),
+    sa.Column('estado', sa.Enum('ABIERTA', 'CERRADA', 'PENDIENTE_REVISION', name='estadocaja'), nullable=True),
+    sa.Column('observaciones', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['farmacia_id'], ['farmacias.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('medicamentos',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('farmacia_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('proveedor_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('codigo_barras', sa.String(length=50), nullable=False),
+    sa.Column('nombre_comercial', sa.String(length=200), nullable=False),
+    sa.Column('nombre_generico', sa.String(length=200), nullable=True),
+    sa.Column('lote', sa.String(length=50), nullable=True),
+    sa.Column('fecha_vencimiento', sa.Date(), nullable=True),
+    sa.Column('precio_compra', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('precio_venta', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('stock_actual', sa.Integer(), nullable=False),
+    sa.Column('stock_minimo', sa.Integer(), nullable=False),
+    sa.Column('es_controlado', sa.Boolean(), nullable=True),
+    sa.Column('requiere_receta', sa.Boolean(), nullable=True),
+    sa.Column('categoria', sa.String(length=100), nullable=True),
+    sa.Column('descripcion', sa.Text(), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['farmacia_id'], ['farmacias.id'], ),
+    sa.ForeignKeyConstraint(['proveedor_id'], ['proveedores.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_medicamentos_codigo_barras'), 'medicamentos', ['codigo_barras'], unique=False)
+    op.create_index(op.f('ix_medicamentos_es_controlado'), 'medicamentos', ['es_controlado'], unique=False)
+    op.create_index(op.f('ix_medicamentos_farmacia_id'), 'medicamentos', ['farmacia_id'], unique=False)
+    op.create_index(op.f('ix_medicamentos_fecha_vencimiento'), 'medicamentos', ['fecha_vencimiento'], unique=False)
+    op.create_index(op.f('ix_medicamentos_nombre_comercial'), 'medicamentos', ['nombre_comercial'], unique=False)
+    op.create_table('movimientos_inventario',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('farmacia_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('medicamento_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('usuario_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('tipo_movimiento', sa.Enum('ENTRADA', 'SALIDA', 'AJUSTE_POSITIVO', 'AJUSTE_NEGATIVO', 'VENCIMIENTO', 'DEVOLUCION', name='tipomovimiento'), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.Column('precio_unitario', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('referencia', sa.String(length=100), nullable=True),
+    sa.Column('observaciones', sa.Text(), nullable=True),
+    sa.Column('fecha_movimiento', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['farmacia_id'], ['farmacias.id'], ),
+    sa.ForeignKeyConstraint(['medicamento_id'], ['medicamentos.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_movimientos_inventario_farmacia_id'), 'movimientos_inventario', ['farmacia_id'], unique=False)
+    op.create_index(op.f('ix_movimientos_inventario_fecha_movimiento'), 'movimientos_inventario', ['fecha_movimiento'], unique=False)
+    op.create_index(op.f('ix_movimientos_inventario_medicamento_id'), 'movimientos_inventario', ['medicamento_id'], unique=False)
+    op.create_table('ventas',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('farmacia_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('usuario_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('cliente_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('caja_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('numero_venta', sa.String(length=50), nullable=False),
+    sa.Column('subtotal', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('descuento', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('total', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('metodo_pago', sa.Enum('EFECTIVO', 'TARJETA', 'TRANSFERENCIA', 'MIXTO', name='metodopago'), nullable=False),
+    sa.Column('referencia_pago', sa.String(length=100), nullable=True),
+    sa.Column('requirio_receta', sa.Boolean(), nullable=True),
+    sa.Column('observaciones', sa.Text(), nullable=True),
+    sa.Column('fecha_venta', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['caja_id'], ['cajas.id'], ),
+    sa.ForeignKeyConstraint(['cliente_id'], ['clientes.id'], ),
+    sa.ForeignKeyConstraint(['farmacia_id'], ['farmacias.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('numero_venta')
+    )
+    op.create_index(op.f('ix_ventas_cliente_id'), 'ventas', ['cliente_id'], unique=False)
+    op.create_index(op.f('ix_ventas_farmacia_id'), 'ventas', ['farmacia_id'], unique=False)
+    op.create_index(op.f('ix_ventas_fecha_venta'), 'ventas', ['fecha_venta'], unique=False)
+    op.create_index(op.f('ix_ventas_usuario_id'), 'ventas', ['usuario_id'], unique=False)
+    op.create_table('detalle_ventas',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('venta_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('medicamento_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.Column('precio_unitario', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('subtotal', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('lote', sa.String(length=50), nullable=True),
+    sa.Column('fecha_vencimiento', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['medicamento_id'], ['medicamentos.id'], ),
+    sa.ForeignKeyConstraint(['venta_id'], ['ventas.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('detalle_ventas')
+    op.drop_index(op.f('ix_ventas_usuario_id'), table_name='ventas')
+    op.drop_index(op.f('ix_ventas_fecha_venta'), table_name='ventas')
+    op.drop_index(op.f('ix_ventas_farmacia_id'), table_name='ventas')
+    op.drop_index(op.f('ix_ventas_cliente_id'), table_name='ventas')
+    op.drop_table('ventas')
+    op.drop_index(op.f('ix_movimientos_inventario_medicamento_id'), table_name='movimientos_inventario')
+    op.drop_index(op.f('ix_movimientos_inventario_fecha_movimiento'), table_name='movimientos_inventario')
+    op.drop_index(op.f('ix_movimientos_inventario_farmacia_id'), table_name='movimientos_inventario')
+    op.drop_table('movimientos_inventario')
+    op.drop_index(op.f('ix_medicamentos_nombre_comercial'), table_name='medicamentos')
+    op.drop_index(op.f('ix_medicamentos_fecha_vencimiento'), table_name='medicamentos')
+    op.drop_index(op.f('ix_medicamentos_farmacia_id'), table_name='medicamentos')
+    op.drop_index(op.f('ix_medicamentos_es_controlado'), table_name='medicamentos')
+    op.drop_index(op.f('ix_medicamentos_codigo_barras'), table_name='medicamentos')
+    op.drop_table('medicamentos')
+    op.drop_table('cajas')
+    op.drop_index(op.f('ix_auditoria_usuario_id'), table_name='auditoria')
+    op.drop_index(op.f('ix_auditoria_farmacia_id'), table_name='auditoria')
+    op.drop_index(op.f('ix_auditoria_created_at'), table_name='auditoria')
+    op.drop_table('auditoria')
+    op.drop_index(op.f('ix_usuarios_username'), table_name='usuarios')
+    op.drop_index(op.f('ix_usuarios_email'), table_name='usuarios')
+    op.drop_table('usuarios')
+    op.drop_table('proveedores')
+    op.drop_table('clientes')
+    op.drop_table('farmacias')
+
+    if op.get_context().dialect.name == "postgresql":
+        for nombre in ENUM_TYPES:
+            op.execute(f"DROP TYPE IF EXISTS {nombre}")
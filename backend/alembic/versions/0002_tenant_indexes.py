@@ -0,0 +1,136 @@
+"""Tenant-scoped composite indexes
+
+Replaces the single-column indexes on medicamentos and ventas with
+indexes that lead with farmacia_id and follow each hot query's filter and
+sort key. On PostgreSQL the indexes are built CONCURRENTLY, so sales and
+stock updates keep running while they build.
+
+The upgrade aborts, listing them, if a pharmacy has two medications with
+the same barcode: the new unique index cannot be built over them. A
+concurrent build that failed part way leaves an INVALID index behind; it
+is dropped and rebuilt on the next run.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, unique, partial index predicate)
+INDEXES = [
+    ("uq_medicamentos_farmacia_codigo_barras", "medicamentos", ["farmacia_id", "codigo_barras"], True, None),
+    ("ix_medicamentos_activos_nombre", "medicamentos", ["farmacia_id", "nombre_comercial", "id"], False, "activo"),
+    ("ix_medicamentos_activos_vencimiento", "medicamentos", ["farmacia_id", "fecha_vencimiento", "id"], False, "activo"),
+    ("ix_medicamentos_stock_bajo", "medicamentos", ["farmacia_id", "stock_actual"], False, "stock_bajo"),
+    ("ix_ventas_farmacia_fecha", "ventas", ["farmacia_id", "fecha_venta", "id"], False, None),
+    ("ix_detalle_ventas_venta_id", "detalle_ventas", ["venta_id"], False, None),
+    ("ix_clientes_farmacia_nombre", "clientes", ["farmacia_id", "nombre", "id"], False, None),
+    ("ix_proveedores_farmacia_nombre", "proveedores", ["farmacia_id", "nombre", "id"], False, None),
+    ("ix_cajas_farmacia_usuario_estado", "cajas", ["farmacia_id", "usuario_id", "estado"], False, None),
+]
+
+# Made redundant by the indexes above
+SINGLE_COLUMN_INDEXES = [
+    ("ix_medicamentos_codigo_barras", "medicamentos", ["codigo_barras"]),
+    ("ix_medicamentos_es_controlado", "medicamentos", ["es_controlado"]),
+    ("ix_medicamentos_farmacia_id", "medicamentos", ["farmacia_id"]),
+    ("ix_medicamentos_fecha_vencimiento", "medicamentos", ["fecha_vencimiento"]),
+    ("ix_medicamentos_nombre_comercial", "medicamentos", ["nombre_comercial"]),
+    ("ix_ventas_farmacia_id", "ventas", ["farmacia_id"]),
+    ("ix_ventas_fecha_venta", "ventas", ["fecha_venta"]),
+]
+
+def _predicate(nombre, dialect: str):
+    """Index predicate written the way the dialect compiles the queries'
+    `activo == True`, so the planner matches it"""
+    if nombre is None:
+        return None
+    activo = "activo = true" if dialect == "postgresql" else "activo = 1"
+    if nombre == "stock_bajo":
+        return sa.text(f"{activo} AND stock_actual <= stock_minimo")
+    return sa.text(activo)
+
+DUPLICATE_BARCODES = sa.text("""
+    SELECT farmacia_id, codigo_barras, count(*) AS medicamentos
+    FROM medicamentos
+    GROUP BY farmacia_id, codigo_barras
+    HAVING count(*) > 1
+    ORDER BY farmacia_id, codigo_barras
+""")
+
+INVALID_INDEXES = sa.text("""
+    SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE NOT i.indisvalid AND c.relname IN :nombres
+""").bindparams(sa.bindparam("nombres", type_=sa.String, expanding=True))
+
+def _check_duplicate_barcodes() -> None:
+    """Abort before building uq_medicamentos_farmacia_codigo_barras over
+    duplicates. Each pair listed has to be fixed by hand (give every
+    medication its own barcode, or merge the rows and move their sales),
+    then the upgrade rerun. Skipped when rendering SQL offline."""
+    if op.get_context().as_sql:
+        return
+    duplicados = op.get_bind().execute(DUPLICATE_BARCODES).all()
+    if duplicados:
+        lista = "\n".join(
+            f"  farmacia_id={farmacia_id} codigo_barras={codigo!r}: {cantidad} medications"
+            for farmacia_id, codigo, cantidad in duplicados
+        )
+        raise RuntimeError(
+            "Cannot create uq_medicamentos_farmacia_codigo_barras: these barcodes are used by more "
+            f"than one medication of the same pharmacy:\n{lista}\n"
+            "Give each medication its own barcode (or merge the rows), then rerun `alembic upgrade head`."
+        )
+
+def _drop_invalid_indexes(concurrently: bool) -> None:
+    """A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind,
+    which `if_not_exists` would then keep instead of rebuilding it"""
+    if not concurrently or op.get_context().as_sql:
+        return
+    nombres = [nombre for nombre, *_ in INDEXES]
+    for (nombre,) in op.get_bind().execute(INVALID_INDEXES, {"nombres": nombres}):
+        op.drop_index(nombre, if_exists=True, postgresql_concurrently=True)
+
+def _run(operations) -> None:
+    """CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction on
+    PostgreSQL"""
+    if op.get_context().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            operations(concurrently=True)
+    else:
+        operations(concurrently=False)
+
+
+def upgrade() -> None:
+    dialect = op.get_context().dialect.name
+    _check_duplicate_barcodes()
+
+    def operations(concurrently: bool):
+        _drop_invalid_indexes(concurrently)
+        for nombre, tabla, columnas, unique, predicado in INDEXES:
+            where = _predicate(predicado, dialect)
+            op.create_index(
+                nombre, tabla, columnas, unique=unique, if_not_exists=True,
+                postgresql_concurrently=concurrently, postgresql_where=where, sqlite_where=where
+            )
+        for nombre, tabla, _ in SINGLE_COLUMN_INDEXES:
+            op.drop_index(nombre, table_name=tabla, if_exists=True, postgresql_concurrently=concurrently)
+
+    _run(operations)
+
+
+def downgrade() -> None:
+    def operations(concurrently: bool):
+        for nombre, tabla, columnas in SINGLE_COLUMN_INDEXES:
+            op.create_index(nombre, tabla, columnas, if_not_exists=True, postgresql_concurrently=concurrently)
+        for nombre, tabla, *_ in reversed(INDEXES):
+            op.drop_index(nombre, table_name=tabla, if_exists=True, postgresql_concurrently=concurrently)
+
+    _run(operations)
@@ -0,0 +1,33 @@
+"""Revoked access tokens
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('tokens_revocados',
+    sa.Column('jti', sa.String(length=32), nullable=False),
+    sa.Column('usuario_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('expira_en', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index(op.f('ix_tokens_revocados_created_at'), 'tokens_revocados', ['created_at'], unique=False)
+    op.create_index(op.f('ix_tokens_revocados_expira_en'), 'tokens_revocados', ['expira_en'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_tokens_revocados_expira_en'), table_name='tokens_revocados')
+    op.drop_index(op.f('ix_tokens_revocados_created_at'), table_name='tokens_revocados')
+    op.drop_table('tokens_revocados')
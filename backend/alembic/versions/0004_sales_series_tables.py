@@ -0,0 +1,149 @@
+"""Sale counters, sales rollups, report jobs and per-pharmacy sale numbers
+
+Creates the tables the sale numbering (secuencias_venta), the dashboard
+rollups (resumen_ventas_dia, resumen_ventas_medicamento) and the report
+job API (reporte_jobs) depend on, and backfills the rollups from the
+existing sales. Sale numbers restart every day in each pharmacy, so the
+baseline's global UNIQUE(numero_venta) becomes UNIQUE(farmacia_id,
+numero_venta). On PostgreSQL it also adds the trigram indexes used by
+the medication search.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Trigram indexes for accent-insensitive medication search (PostgreSQL only).
+# Frozen copy of app.models.medicamento.TRIGRAM_SEARCH_DDL as of this
+# revision, on purpose: a migration must keep creating what it created when
+# it was written, so later changes to the model's DDL go in a new migration
+# instead of being picked up here.
+TRIGRAM_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() is not IMMUTABLE, so it cannot be used in an index directly
+    "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS "
+    "$$ SELECT public.unaccent('public.unaccent', $1) $$ "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT",
+    "CREATE INDEX IF NOT EXISTS ix_medicamentos_nombre_comercial_trgm ON medicamentos "
+    "USING gin (f_unaccent(lower(nombre_comercial)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_medicamentos_nombre_generico_trgm ON medicamentos "
+    "USING gin (f_unaccent(lower(nombre_generico)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_medicamentos_codigo_barras_trgm ON medicamentos "
+    "USING gin (lower(codigo_barras) gin_trgm_ops)",
+]
+
+# SQLite keeps the baseline's UNIQUE(numero_venta) unnamed: batch mode
+# names the reflected unique constraints with this convention
+SQLITE_NAMING_CONVENTION = {"uq": "uq_%(table_name)s_%(column_0_N_name)s"}
+
+BACKFILL_ROLLUPS = [
+    """
+    INSERT INTO resumen_ventas_dia (farmacia_id, fecha, num_ventas, total)
+    SELECT farmacia_id, date(fecha_venta), count(id), sum(total)
+    FROM ventas
+    GROUP BY farmacia_id, date(fecha_venta)
+    """,
+    """
+    INSERT INTO resumen_ventas_medicamento (farmacia_id, fecha, medicamento_id, cantidad, subtotal)
+    SELECT ventas.farmacia_id, date(ventas.fecha_venta), detalle_ventas.medicamento_id,
+           sum(detalle_ventas.cantidad), sum(detalle_ventas.subtotal)
+    FROM detalle_ventas JOIN ventas ON ventas.id = detalle_ventas.venta_id
+    GROUP BY ventas.farmacia_id, date(ventas.fecha_venta), detalle_ventas.medicamento_id
+    """,
+]
+
+def _unique_name(dialect: str, columns) -> str:
+    """Name of an unnamed unique constraint on ventas"""
+    if dialect == "postgresql":
+        return f"ventas_{'_'.join(columns)}_key"
+    return f"uq_ventas_{'_'.join(columns)}"
+
+def _swap_unique(drop_columns, create_columns) -> None:
+    dialect = op.get_context().dialect.name
+    with op.batch_alter_table("ventas", naming_convention=SQLITE_NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(_unique_name(dialect, drop_columns), type_="unique")
+        batch_op.create_unique_constraint(_unique_name(dialect, create_columns), create_columns)
+
+
+def upgrade() -> None:
+    op.create_table('secuencias_venta',
+    sa.Column('farmacia_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('ultimo_numero', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['farmacia_id'], ['farmacias.id'], ),
+    sa.PrimaryKeyConstraint('farmacia_id', 'fecha')
+    )
+    op.create_table('resumen_ventas_dia',
+    sa.Column('farmacia_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('num_ventas', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['farmacia_id'], ['farmacias.id'], ),
+    sa.PrimaryKeyConstraint('farmacia_id', 'fecha')
+    )
+    op.create_table('resumen_ventas_medicamento',
+    sa.Column('farmacia_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('medicamento_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.Column('subtotal', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['farmacia_id'], ['farmacias.id'], ),
+    sa.ForeignKeyConstraint(['medicamento_id'], ['medicamentos.id'], ),
+    sa.PrimaryKeyConstraint('farmacia_id', 'fecha', 'medicamento_id')
+    )
+    op.create_table('reporte_jobs',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('farmacia_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('usuario_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('formato', sa.String(length=20), nullable=False),
+    sa.Column('version', sa.String(length=64), nullable=False),
+    sa.Column('estado', sa.Enum('PENDIENTE', 'EN_PROCESO', 'COMPLETADO', 'ERROR', name='estadoreportejob'), nullable=False),
+    sa.Column('archivo', sa.String(length=500), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['farmacia_id'], ['farmacias.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_reporte_jobs_artefacto', 'reporte_jobs', ['farmacia_id', 'tipo', 'formato', 'version'], unique=False)
+
+    for statement in BACKFILL_ROLLUPS:
+        op.execute(statement)
+
+    _swap_unique(["numero_venta"], ["farmacia_id", "numero_venta"])
+
+    if op.get_context().dialect.name == "postgresql":
+        for statement in TRIGRAM_SEARCH_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_medicamentos_codigo_barras_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_medicamentos_nombre_generico_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_medicamentos_nombre_comercial_trgm")
+        op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
+
+    # Fails if two pharmacies already share a sale number
+    _swap_unique(["farmacia_id", "numero_venta"], ["numero_venta"])
+
+    op.drop_index('ix_reporte_jobs_artefacto', table_name='reporte_jobs')
+    op.drop_table('reporte_jobs')
+    op.drop_table('resumen_ventas_medicamento')
+    op.drop_table('resumen_ventas_dia')
+    op.drop_table('secuencias_venta')
+
+    if op.get_context().dialect.name == "postgresql":
+        op.execute("DROP TYPE IF EXISTS estadoreportejob")
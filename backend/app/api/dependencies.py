@@ -1,29 +1,78 @@
 from typing import Optional
+from dataclasses import dataclass
 import uuid
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import decode_access_token
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.cache import TTLCache
+from app.core.security import verify_access_token
 from app.models.user import Usuario, RolUsuario
+from app.services.token_revocation import revocation_list
+from app.services.user_changes import UserChangeFeed
 
 security = HTTPBearer()
 
-async def get_current_user(
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Immutable snapshot of the authenticated user, safe to share between requests"""
+    id: uuid.UUID
+    farmacia_id: uuid.UUID
+    rol: RolUsuario
+    activo: bool
+
+    @classmethod
+    def from_usuario(cls, user: Usuario) -> "UserPrincipal":
+        return cls(id=user.id, farmacia_id=user.farmacia_id, rol=user.rol, activo=user.activo)
+
+# Authenticated users by id. Writers to `usuarios` must call invalidate_user()
+# for this worker; the other workers pick the change up through user_changes
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+user_changes = UserChangeFeed(user_cache, refresh_interval=settings.USER_CACHE_REFRESH_SECONDS)
+
+def invalidate_user(user_id: uuid.UUID) -> None:
+    """Drop a user from the cache so changes (e.g. deactivation) apply on the next request"""
+    user_cache.invalidate(user_id)
+
+async def load_user_principal(db: AsyncSession, user_id: uuid.UUID) -> Optional[UserPrincipal]:
+    """Get the user snapshot from the cache, falling back to the database"""
+    await user_changes.refresh(db)
+    principal = user_cache.get(user_id)
+    if principal is None:
+        user = await db.get(Usuario, user_id)
+        if user is None:
+            return None
+        principal = UserPrincipal.from_usuario(user)
+        user_cache.set(user_id, principal)
+    return principal
+
+async def get_token_payload(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> Usuario:
+    db: AsyncSession = Depends(get_async_db)
+) -> dict:
+    """Claims of the request's access token, if it is valid and not revoked"""
+    payload = verify_access_token(credentials.credentials)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    
+    await revocation_list.refresh(db)
+    if revocation_list.is_revoked(payload.get("jti")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+    return payload
+
+async def get_current_user(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserPrincipal:
     """Get current authenticated user"""
     try:
-        token = credentials.credentials
-        payload = decode_access_token(token)
-        
-        if payload is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials"
-            )
-        
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(
@@ -39,7 +88,7 @@ async def get_current_user(
                 detail="Invalid authentication credentials"
             )
         
-        user = db.query(Usuario).filter(Usuario.id == user_uuid).first()
+        user = await load_user_principal(db, user_uuid)
         if user is None or not user.activo:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,7 +101,7 @@ async def get_current_user(
 
 def require_role(allowed_roles: list[RolUsuario]):
     """Dependency to check if user has required role"""
-    def role_checker(current_user: Usuario = Depends(get_current_user)) -> Usuario:
+    def role_checker(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
         if current_user.rol not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -62,7 +111,7 @@ def require_role(allowed_roles: list[RolUsuario]):
     return role_checker
 
 # Specific role dependencies
-def get_admin_user(current_user: Usuario = Depends(get_current_user)) -> Usuario:
+def get_admin_user(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
     """Require admin role"""
     if current_user.rol != RolUsuario.ADMINISTRADOR:
         raise HTTPException(
@@ -71,7 +120,7 @@ def get_admin_user(current_user: Usuario = Depends(get_current_user)) -> Usuario
         )
     return current_user
 
-def get_farmaceutico_or_admin(current_user: Usuario = Depends(get_current_user)) -> Usuario:
+def get_farmaceutico_or_admin(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
     """Require farmaceutico or admin role"""
     if current_user.rol not in [RolUsuario.ADMINISTRADOR, RolUsuario.FARMACEUTICO]:
         raise HTTPException(
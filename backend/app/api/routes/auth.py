@@ -1,23 +1,56 @@
+import asyncio
+import logging
 from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import verify_password, create_access_token
+from sqlalchemy import case, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.core.security import verify_and_update_password, create_access_token
+from app.api.dependencies import UserPrincipal, get_current_user, get_token_payload
 from app.models.user import Usuario
+from app.services.token_revocation import revocation_list
 from app.schemas.user import LoginRequest, TokenResponse, UsuarioResponse
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+logger = logging.getLogger(__name__)
+
+# Login writes in flight, referenced so they are not garbage collected
+_login_writes = set()
+
+async def _record_login(user_id: UUID, ultimo_acceso: datetime, hash_anterior: str, hash_nuevo: Optional[str]) -> None:
+    """Store the last access time and, if the cost changed, the rehashed
+    password (unless the password itself was changed meanwhile)"""
+    valores = {"ultimo_acceso": ultimo_acceso}
+    if hash_nuevo is not None:
+        valores["password_hash"] = case(
+            (Usuario.password_hash == hash_anterior, hash_nuevo),
+            else_=Usuario.password_hash
+        )
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Usuario).where(Usuario.id == user_id).values(**valores))
+            await db.commit()
+    except SQLAlchemyError as e:
+        logger.warning("Could not record login of user %s: %s", user_id, e)
+
 @router.post("/login", response_model=TokenResponse)
 async def login(
     credentials: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Authenticate user and return JWT token"""
     # Find user
-    user = db.query(Usuario).filter(Usuario.username == credentials.username).first()
+    result = await db.execute(select(Usuario).where(Usuario.username == credentials.username))
+    user = result.scalars().first()
     
-    if not user or not verify_password(credentials.password, user.password_hash):
+    valido, hash_nuevo = False, None
+    if user is not None:
+        valido, hash_nuevo = await verify_and_update_password(credentials.password, user.password_hash)
+    if not valido:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -29,9 +62,14 @@ async def login(
             detail="User account is inactive"
         )
     
-    # Update last access
+    # Update last access in the background (own session and commit): the
+    # login does not wait for it
     user.ultimo_acceso = datetime.utcnow()
-    db.commit()
+    tarea = asyncio.get_running_loop().create_task(
+        _record_login(user.id, user.ultimo_acceso, user.password_hash, hash_nuevo)
+    )
+    _login_writes.add(tarea)
+    tarea.add_done_callback(_login_writes.discard)
     
     # Create access token
     access_token = create_access_token(
@@ -42,3 +80,25 @@ async def login(
         access_token=access_token,
         user=UsuarioResponse.from_orm(user)
     )
+
+@router.post("/logout")
+async def logout(
+    payload: dict = Depends(get_token_payload),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Revoke the access token used for this request"""
+    if "jti" not in payload:
+        # Issued before tokens carried an id: it lapses at its expiry
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This token cannot be revoked"
+        )
+    
+    await revocation_list.revoke(
+        db,
+        payload["jti"],
+        current_user.id,
+        datetime.utcfromtimestamp(payload["exp"])
+    )
+    return {"message": "Logged out"}
@@ -1,9 +1,9 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session, selectinload
 from app.core.database import get_db
-from app.api.dependencies import get_current_user
-from app.models.user import Usuario
+from app.core.pagination import paginate, set_next_cursor
+from app.api.dependencies import get_current_user, UserPrincipal
 from app.models.cliente import Cliente
 from app.models.venta import Venta
 from app.schemas.cliente import ClienteCreate, ClienteUpdate, ClienteResponse
@@ -13,10 +13,12 @@ router = APIRouter(prefix="/clientes", tags=["Clientes"])
 
 @router.get("", response_model=List[ClienteResponse])
 async def get_clientes(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all clients for the pharmacy"""
@@ -25,13 +27,16 @@ async def get_clientes(
     if search:
         query = query.filter(Cliente.nombre.ilike(f"%{search}%"))
         
-    clientes = query.offset(skip).limit(limit).all()
+    clientes, next_cursor = paginate(
+        query, [Cliente.nombre, Cliente.id], limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, next_cursor)
     return clientes
 
 @router.post("", response_model=ClienteResponse, status_code=status.HTTP_201_CREATED)
 async def create_cliente(
     cliente_data: ClienteCreate,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Create new client"""
@@ -47,7 +52,7 @@ async def create_cliente(
 @router.get("/{cliente_id}", response_model=ClienteResponse)
 async def get_cliente(
     cliente_id: str,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get client by ID"""
@@ -64,7 +69,7 @@ async def get_cliente(
 async def update_cliente(
     cliente_id: str,
     cliente_data: ClienteUpdate,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update client"""
@@ -86,11 +91,11 @@ async def update_cliente(
 @router.get("/{cliente_id}/historial", response_model=List[VentaResponse])
 async def get_cliente_historial(
     cliente_id: str,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get client purchase history"""
-    ventas = db.query(Venta).filter(
+    ventas = db.query(Venta).options(selectinload(Venta.detalles)).filter(
         Venta.cliente_id == cliente_id,
         Venta.farmacia_id == current_user.farmacia_id
     ).order_by(Venta.fecha_venta.desc()).all()
@@ -4,14 +4,15 @@ from typing import List, Any
 from uuid import UUID
 import uuid
 
-from app.core.database import get_db
+from app.core.database import get_db, pool_stats
+from app.api.dependencies import UserPrincipal, get_admin_user, invalidate_user
 from app.models.farmacia import Farmacia
 from app.models.user import Usuario, RolUsuario
 from app.schemas.configuracion import (
     ConfigurationSchema, UsuarioRead, UsuarioCreate, UsuarioUpdate,
     GeneralSettings, SystemParameters, POSSettings, ReportPreferences, SecuritySettings
 )
-from app.core.security import get_password_hash
+from app.core.security import hash_password
 
 router = APIRouter(prefix="/configuracion", tags=["configuracion"])
 
@@ -95,7 +96,7 @@ async def create_usuario(user_in: UsuarioCreate, db: Session = Depends(get_db)):
         username=user_in.username,
         email=user_in.email,
         nombre_completo=user_in.nombre_completo,
-        password_hash=get_password_hash(user_in.password),
+        password_hash=await hash_password(user_in.password),
         rol=user_in.rol,
         activo=user_in.activo
     )
@@ -113,12 +114,13 @@ async def update_usuario(user_id: UUID, user_in: UsuarioUpdate, db: Session = De
     
     update_data = user_in.dict(exclude_unset=True)
     if "password" in update_data:
-        user.password_hash = get_password_hash(update_data.pop("password"))
+        user.password_hash = await hash_password(update_data.pop("password"))
     
     for field, value in update_data.items():
         setattr(user, field, value)
         
     db.commit()
+    invalidate_user(user.id)
     db.refresh(user)
     return user
 
@@ -130,4 +132,14 @@ async def delete_usuario(user_id: UUID, db: Session = Depends(get_db)):
     
     db.delete(user)
     db.commit()
+    invalidate_user(user_id)
     return {"message": "Usuario eliminado correctamente"}
+
+# --- Diagnostics ---
+
+@router.get("/db-pool/stats")
+async def get_db_pool_stats(
+    current_user: UserPrincipal = Depends(get_admin_user)
+):
+    """Uso de los pools de conexiones a la base de datos de este worker"""
+    return pool_stats()
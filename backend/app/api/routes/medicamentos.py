@@ -1,58 +1,80 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from app.core.database import get_db
-from app.api.dependencies import get_current_user, get_farmaceutico_or_admin
-from app.models.user import Usuario
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.pagination import clamp_limit, paginate_async, set_next_cursor
+from app.api.dependencies import get_current_user, get_farmaceutico_or_admin, UserPrincipal
 from app.models.medicamento import Medicamento
-from app.schemas.medicamento import MedicamentoCreate, MedicamentoUpdate, MedicamentoResponse
+from app.schemas.medicamento import MedicamentoCreate, MedicamentoUpdate, MedicamentoResponse, AlertasVencimientoResponse
+from app.services.barcode_index import barcode_index
+from app.services.expiry_alerts import expiry_alerts
+from app.services.search_index import search_index, search_medicamentos
+from app.services.dashboard import invalidate_dashboard
 
 router = APIRouter(prefix="/medicamentos", tags=["Medicamentos"])
 
+DUPLICATE_BARCODE = "Medication with this barcode already exists"
+
+async def _commit_medicamento(db: AsyncSession) -> None:
+    """Commit, turning a barcode clash (unique per pharmacy) into a 400"""
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DUPLICATE_BARCODE
+        )
+
 @router.get("", response_model=List[MedicamentoResponse])
 async def get_medicamentos(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     es_controlado: Optional[bool] = None,
     activo: bool = True,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all medications for the pharmacy"""
-    query = db.query(Medicamento).filter(
+    if search:
+        return await db.run_sync(
+            search_medicamentos,
+            current_user.farmacia_id,
+            search,
+            activo=activo,
+            es_controlado=es_controlado,
+            skip=skip,
+            limit=clamp_limit(limit)
+        )
+    
+    query = select(Medicamento).where(
         Medicamento.farmacia_id == current_user.farmacia_id,
         Medicamento.activo == activo
     )
     
-    if search:
-        query = query.filter(
-            or_(
-                Medicamento.nombre_comercial.ilike(f"%{search}%"),
-                Medicamento.nombre_generico.ilike(f"%{search}%"),
-                Medicamento.codigo_barras.ilike(f"%{search}%")
-            )
-        )
-    
     if es_controlado is not None:
-        query = query.filter(Medicamento.es_controlado == es_controlado)
+        query = query.where(Medicamento.es_controlado == es_controlado)
+    
+    medicamentos, next_cursor = await paginate_async(
+        db, query, [Medicamento.nombre_comercial, Medicamento.id], limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, next_cursor)
     
-    medicamentos = query.offset(skip).limit(limit).all()
     return medicamentos
 
 @router.get("/barcode/{codigo_barras}", response_model=MedicamentoResponse)
 async def get_medicamento_by_barcode(
     codigo_barras: str,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get medication by barcode"""
-    medicamento = db.query(Medicamento).filter(
-        Medicamento.farmacia_id == current_user.farmacia_id,
-        Medicamento.codigo_barras == codigo_barras,
-        Medicamento.activo == True
-    ).first()
+    medicamento = await db.run_sync(barcode_index.lookup, current_user.farmacia_id, codigo_barras)
     
     if not medicamento:
         raise HTTPException(
@@ -62,23 +84,31 @@ async def get_medicamento_by_barcode(
     
     return medicamento
 
+@router.get("/barcode-index/stats")
+async def get_barcode_index_stats(
+    current_user: UserPrincipal = Depends(get_farmaceutico_or_admin)
+):
+    """Size and hit ratio of the in-process barcode index"""
+    return barcode_index.stats(current_user.farmacia_id)
+
 @router.post("", response_model=MedicamentoResponse, status_code=status.HTTP_201_CREATED)
 async def create_medicamento(
     medicamento_data: MedicamentoCreate,
-    current_user: Usuario = Depends(get_farmaceutico_or_admin),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_farmaceutico_or_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create new medication"""
     # Check if barcode already exists
-    existing = db.query(Medicamento).filter(
+    result = await db.execute(select(Medicamento).where(
         Medicamento.farmacia_id == current_user.farmacia_id,
         Medicamento.codigo_barras == medicamento_data.codigo_barras
-    ).first()
+    ))
+    existing = result.scalars().first()
     
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Medication with this barcode already exists"
+            detail=DUPLICATE_BARCODE
         )
     
     medicamento = Medicamento(
@@ -87,8 +117,12 @@ async def create_medicamento(
     )
     
     db.add(medicamento)
-    db.commit()
-    db.refresh(medicamento)
+    await _commit_medicamento(db)
+    await db.refresh(medicamento)
+    barcode_index.put(medicamento)
+    search_index.put(medicamento)
+    expiry_alerts.put(medicamento)
+    invalidate_dashboard(current_user.farmacia_id)
     
     return medicamento
 
@@ -96,14 +130,15 @@ async def create_medicamento(
 async def update_medicamento(
     medicamento_id: str,
     medicamento_data: MedicamentoUpdate,
-    current_user: Usuario = Depends(get_farmaceutico_or_admin),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_farmaceutico_or_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update medication"""
-    medicamento = db.query(Medicamento).filter(
+    result = await db.execute(select(Medicamento).where(
         Medicamento.id == medicamento_id,
         Medicamento.farmacia_id == current_user.farmacia_id
-    ).first()
+    ))
+    medicamento = result.scalars().first()
     
     if not medicamento:
         raise HTTPException(
@@ -114,21 +149,33 @@ async def update_medicamento(
     for field, value in medicamento_data.dict(exclude_unset=True).items():
         setattr(medicamento, field, value)
     
-    db.commit()
-    db.refresh(medicamento)
+    await _commit_medicamento(db)
+    await db.refresh(medicamento)
+    barcode_index.put(medicamento)
+    search_index.put(medicamento)
+    expiry_alerts.put(medicamento)
+    invalidate_dashboard(current_user.farmacia_id)
     
     return medicamento
 
 @router.get("/alertas/stock-minimo", response_model=List[MedicamentoResponse])
 async def get_alertas_stock_minimo(
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get medications with low stock"""
-    medicamentos = db.query(Medicamento).filter(
+    result = await db.execute(select(Medicamento).where(
         Medicamento.farmacia_id == current_user.farmacia_id,
         Medicamento.activo == True,
         Medicamento.stock_actual <= Medicamento.stock_minimo
-    ).all()
+    ))
     
-    return medicamentos
+    return result.scalars().all()
+
+@router.get("/alertas/vencimiento", response_model=AlertasVencimientoResponse)
+async def get_alertas_vencimiento(
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get expired medications and those expiring within 30, 60 and 90 days"""
+    return await db.run_sync(expiry_alerts.buckets, current_user.farmacia_id)
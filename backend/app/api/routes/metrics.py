@@ -0,0 +1,93 @@
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.pool import QueuePool
+
+from app.api.dependencies import user_cache, user_changes
+from app.core.config import settings
+from app.core.database import engine, async_engine, sync_pool_metrics, async_pool_metrics
+from app.core.metrics import PrometheusWriter
+from app.core.request_metrics import request_metrics
+from app.core.security import verified_tokens
+from app.services.barcode_index import barcode_index
+from app.services.dashboard import dashboard_cache
+from app.services.expiry_alerts import expiry_alerts
+from app.services.report_pool import report_pool
+from app.services.token_revocation import revocation_list
+
+def verify_metrics_token(authorization: Optional[str] = Header(None)) -> None:
+    """Require METRICS_TOKEN as a bearer token, when one is configured"""
+    if not settings.METRICS_TOKEN:
+        return
+    esperado = f"Bearer {settings.METRICS_TOKEN}"
+    if authorization is None or not secrets.compare_digest(authorization.encode(), esperado.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+router = APIRouter(tags=["metrics"], dependencies=[Depends(verify_metrics_token)])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+MS = 0.001
+
+def _request_metrics(writer: PrometheusWriter) -> None:
+    for (method, route), metricas in sorted(request_metrics.routes.items()):
+        for status, total in sorted(metricas.status.items()):
+            writer.sample("farmacia_http_requests_total", "counter", "HTTP requests by route and status", total, method=method, route=route, status=status)
+        writer.histogram("farmacia_http_request_duration_seconds", "Request latency", metricas.duration_ms, scale=MS, method=method, route=route)
+        writer.histogram("farmacia_http_request_db_seconds", "SQL time per request", metricas.db_ms, scale=MS, method=method, route=route)
+        writer.histogram("farmacia_http_request_db_statements", "SQL statements per request", metricas.statements, method=method, route=route)
+        writer.histogram("farmacia_http_response_size_bytes", "Response body size", metricas.response_bytes, method=method, route=route)
+
+def _db_pool_metrics(writer: PrometheusWriter) -> None:
+    for nombre, pool, metricas in [
+        ("sync", engine.pool, sync_pool_metrics),
+        ("async", async_engine.sync_engine.pool, async_pool_metrics),
+    ]:
+        if isinstance(pool, QueuePool):
+            writer.sample("farmacia_db_pool_size", "gauge", "Configured pool size", metricas.pool_size, engine=nombre)
+            writer.sample("farmacia_db_pool_checked_out", "gauge", "Connections in use", pool.checkedout(), engine=nombre)
+            writer.sample("farmacia_db_pool_overflow", "gauge", "Connections open beyond pool_size", max(0, pool.overflow()), engine=nombre)
+        writer.sample("farmacia_db_pool_timeouts_total", "counter", "Connection checkouts that timed out", metricas.timeouts, engine=nombre)
+        writer.histogram("farmacia_db_pool_checkout_seconds", "Connection checkout latency", metricas.checkout_ms, scale=MS, engine=nombre)
+
+def _report_pool_metrics(writer: PrometheusWriter) -> None:
+    stats = report_pool.stats()
+    writer.sample("farmacia_report_pool_running", "gauge", "Reports rendering", stats["running"])
+    writer.sample("farmacia_report_pool_queue_depth", "gauge", "Reports waiting or rendering", stats["queue_depth"])
+    for resultado in ["completed", "failed", "rejected"]:
+        writer.sample("farmacia_report_pool_jobs_total", "counter", "Report renders by outcome", stats[resultado], result=resultado)
+
+def _cache_metrics(writer: PrometheusWriter) -> None:
+    for nombre, stats in [
+        ("user", user_cache.stats()),
+        ("dashboard", dashboard_cache.stats()),
+        ("barcode", barcode_index.stats()),
+        ("token", verified_tokens.stats()),
+    ]:
+        writer.sample("farmacia_cache_entries", "gauge", "Entries held by the cache", stats["size"], cache=nombre)
+        writer.sample("farmacia_cache_hits_total", "counter", "Cache hits", stats["hits"], cache=nombre)
+        writer.sample("farmacia_cache_misses_total", "counter", "Cache misses", stats["misses"], cache=nombre)
+    revocaciones = revocation_list.stats()
+    writer.sample("farmacia_revoked_tokens", "gauge", "Unexpired revoked tokens held in memory", revocaciones["size"])
+    writer.sample("farmacia_revocation_refreshes_total", "counter", "Reads of tokens_revocados", revocaciones["refreshes"])
+    cambios = user_changes.stats()
+    writer.sample("farmacia_user_change_refreshes_total", "counter", "Reads of changed usuarios", cambios["refreshes"])
+    writer.sample("farmacia_user_change_evictions_total", "counter", "Users evicted after a change elsewhere", cambios["evictions"])
+    vencimientos = expiry_alerts.stats()
+    writer.sample("farmacia_expiry_alerts", "gauge", "Expiry alerts held in memory", vencimientos["size"])
+    writer.sample("farmacia_expiry_alert_pharmacies", "gauge", "Pharmacies loaded in the expiry alert index", vencimientos["farmacias"])
+    writer.sample("farmacia_expiry_alert_refreshes_total", "counter", "Scheduled expiry alert refreshes", vencimientos["refreshes"])
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas de este worker en formato de texto de Prometheus"""
+    writer = PrometheusWriter()
+    _request_metrics(writer)
+    _db_pool_metrics(writer)
+    _report_pool_metrics(writer)
+    _cache_metrics(writer)
+    return PlainTextResponse(writer.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,33 +1,42 @@
-from typing import List
+from typing import List, Optional
+import uuid
 from datetime import datetime
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.core.database import get_db
-from app.api.dependencies import get_current_user
-from app.models.user import Usuario
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import insert, select
+from app.core.database import get_async_db
+from app.core.pagination import paginate_async, set_next_cursor
+from app.api.dependencies import get_current_user, UserPrincipal
 from app.models.venta import Venta, DetalleVenta
 from app.models.medicamento import Medicamento
 from app.models.inventario import MovimientoInventario, TipoMovimiento
 from app.models.caja import Caja, EstadoCaja
 from app.schemas.venta import VentaCreate, VentaResponse
+from app.services.stock import aggregate_quantities, load_medicamentos_for_sale, decrement_stock, insufficient_stock
+from app.services.secuencias import next_numero_venta
+from app.services.barcode_index import barcode_index
+from app.services.expiry_alerts import expiry_alerts
+from app.services.dashboard import invalidate_dashboard
+from app.services.rollup import record_sale
 
 router = APIRouter(prefix="/pos", tags=["POS"])
 
 @router.post("/ventas", response_model=VentaResponse, status_code=status.HTTP_201_CREATED)
 async def crear_venta(
     venta_data: VentaCreate,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Process a sale"""
     # Verify there's an open cash register
-    caja_abierta = db.query(Caja).filter(
+    result = await db.execute(select(Caja).where(
         Caja.farmacia_id == current_user.farmacia_id,
         Caja.usuario_id == current_user.id,
         Caja.estado == EstadoCaja.ABIERTA
-    ).first()
+    ))
+    caja_abierta = result.scalars().first()
     
     if not caja_abierta:
         raise HTTPException(
@@ -35,17 +44,19 @@ async def crear_venta(
             detail="No open cash register found. Please open a cash register first."
         )
     
+    # Load and lock every medication of the sale in a single query
+    medicamentos = await db.run_sync(
+        load_medicamentos_for_sale,
+        current_user.farmacia_id,
+        [detalle.medicamento_id for detalle in venta_data.detalles]
+    )
+    
     # Calculate totals
     subtotal = Decimal("0")
     detalles_to_create = []
     
     for detalle in venta_data.detalles:
-        # Get medication
-        medicamento = db.query(Medicamento).filter(
-            Medicamento.id == detalle.medicamento_id,
-            Medicamento.farmacia_id == current_user.farmacia_id,
-            Medicamento.activo == True
-        ).first()
+        medicamento = medicamentos.get(detalle.medicamento_id)
         
         if not medicamento:
             raise HTTPException(
@@ -53,13 +64,6 @@ async def crear_venta(
                 detail=f"Medication {detalle.medicamento_id} not found"
             )
         
-        # Check stock
-        if medicamento.stock_actual < detalle.cantidad:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient stock for {medicamento.nombre_comercial}"
-            )
-        
         # Calculate subtotal for this item
         item_subtotal = detalle.precio_unitario * detalle.cantidad
         subtotal += item_subtotal
@@ -72,80 +76,99 @@ async def crear_venta(
             "lote": detalle.lote or medicamento.lote,
             "fecha_vencimiento": detalle.fecha_vencimiento or medicamento.fecha_vencimiento
         })
-        
-        # Update stock
-        medicamento.stock_actual -= detalle.cantidad
-    
-    # Calculate total
-    total = subtotal - venta_data.descuento
     
     # Generate sale number
-    today = datetime.now().strftime("%Y%m%d")
-    last_venta = db.query(Venta).filter(
-        Venta.farmacia_id == current_user.farmacia_id
-    ).order_by(Venta.created_at.desc()).first()
+    numero_venta = await next_numero_venta(db, current_user.farmacia_id)
     
-    if last_venta and last_venta.numero_venta.startswith(today):
-        seq = int(last_venta.numero_venta.split("-")[-1]) + 1
-    else:
-        seq = 1
+    # Check and update stock for all lines at once
+    cantidades = aggregate_quantities(venta_data.detalles)
+    nuevo_stock = await db.run_sync(decrement_stock, current_user.farmacia_id, cantidades)
+    sin_stock = insufficient_stock(cantidades, nuevo_stock)
     
-    numero_venta = f"{today}-{seq:04d}"
+    if sin_stock:
+        nombres = ", ".join(medicamentos[medicamento_id].nombre_comercial for medicamento_id in sin_stock)
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient stock for {nombres}"
+        )
     
-    # Create sale
-    venta = Venta(
-        farmacia_id=current_user.farmacia_id,
-        usuario_id=current_user.id,
-        cliente_id=venta_data.cliente_id,
-        caja_id=caja_abierta.id,
-        numero_venta=numero_venta,
-        subtotal=subtotal,
-        descuento=venta_data.descuento,
-        total=total,
-        metodo_pago=venta_data.metodo_pago,
-        referencia_pago=venta_data.referencia_pago,
-        requirio_receta=venta_data.requirio_receta,
-        observaciones=venta_data.observaciones
-    )
+    # Calculate total
+    total = subtotal - venta_data.descuento
     
-    db.add(venta)
-    db.flush()
+    # Create sale
+    venta_values = {
+        "id": uuid.uuid4(),
+        "farmacia_id": current_user.farmacia_id,
+        "usuario_id": current_user.id,
+        "cliente_id": venta_data.cliente_id,
+        "caja_id": caja_abierta.id,
+        "numero_venta": numero_venta,
+        "subtotal": subtotal,
+        "descuento": venta_data.descuento,
+        "total": total,
+        "metodo_pago": venta_data.metodo_pago,
+        "referencia_pago": venta_data.referencia_pago,
+        "requirio_receta": venta_data.requirio_receta,
+        "observaciones": venta_data.observaciones,
+        "fecha_venta": datetime.utcnow()
+    }
+    await db.execute(insert(Venta), [venta_values])
     
-    # Create sale details and inventory movements
-    for detalle_data in detalles_to_create:
-        detalle = DetalleVenta(
-            venta_id=venta.id,
-            **detalle_data
-        )
-        db.add(detalle)
+    # Create sale details and inventory movements, one multi-row INSERT each
+    # (skipped for an empty sale: an INSERT with no rows would insert one of defaults)
+    detalles = [
+        {"id": uuid.uuid4(), "venta_id": venta_values["id"], **detalle_data}
+        for detalle_data in detalles_to_create
+    ]
+    if detalles:
+        await db.execute(insert(DetalleVenta), detalles)
         
-        # Create inventory movement
-        movimiento = MovimientoInventario(
-            farmacia_id=current_user.farmacia_id,
-            medicamento_id=detalle_data["medicamento_id"],
-            usuario_id=current_user.id,
-            tipo_movimiento=TipoMovimiento.SALIDA,
-            cantidad=detalle_data["cantidad"],
-            precio_unitario=detalle_data["precio_unitario"],
-            referencia=numero_venta
-        )
-        db.add(movimiento)
+        await db.execute(insert(MovimientoInventario), [
+            {
+                "farmacia_id": current_user.farmacia_id,
+                "medicamento_id": detalle_data["medicamento_id"],
+                "usuario_id": current_user.id,
+                "tipo_movimiento": TipoMovimiento.SALIDA,
+                "cantidad": detalle_data["cantidad"],
+                "precio_unitario": detalle_data["precio_unitario"],
+                "referencia": numero_venta
+            } for detalle_data in detalles_to_create
+        ])
+    
+    await db.run_sync(
+        record_sale,
+        current_user.farmacia_id,
+        venta_values["fecha_venta"].date(),
+        total,
+        detalles_to_create
+    )
     
-    db.commit()
-    db.refresh(venta)
+    await db.commit()
+    barcode_index.apply_stock(current_user.farmacia_id, nuevo_stock)
+    expiry_alerts.apply_stock(current_user.farmacia_id, nuevo_stock)
+    invalidate_dashboard(current_user.farmacia_id)
     
-    return venta
+    # Everything in the response is already known, no need to reload the sale
+    return VentaResponse(**venta_values, detalles=detalles)
 
 @router.get("/ventas", response_model=List[VentaResponse])
 async def get_ventas(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get sales history"""
-    ventas = db.query(Venta).filter(
+    query = select(Venta).options(selectinload(Venta.detalles)).where(
         Venta.farmacia_id == current_user.farmacia_id
-    ).order_by(Venta.fecha_venta.desc()).offset(skip).limit(limit).all()
+    )
+    
+    ventas, next_cursor = await paginate_async(
+        db, query, [Venta.fecha_venta, Venta.id], limit, cursor=cursor, descending=True, skip=skip
+    )
+    set_next_cursor(response, next_cursor)
     
     return ventas
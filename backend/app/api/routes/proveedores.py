@@ -1,9 +1,9 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.api.dependencies import get_current_user, get_farmaceutico_or_admin
-from app.models.user import Usuario
+from app.core.pagination import paginate, set_next_cursor
+from app.api.dependencies import get_current_user, get_farmaceutico_or_admin, UserPrincipal
 from app.models.proveedor import Proveedor
 from app.models.inventario import MovimientoInventario
 from app.schemas.proveedor import ProveedorCreate, ProveedorUpdate, ProveedorResponse
@@ -12,21 +12,27 @@ router = APIRouter(prefix="/proveedores", tags=["Proveedores"])
 
 @router.get("", response_model=List[ProveedorResponse])
 async def get_proveedores(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    current_user: Usuario = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all providers for the pharmacy"""
-    proveedores = db.query(Proveedor).filter(
+    query = db.query(Proveedor).filter(
         Proveedor.farmacia_id == current_user.farmacia_id
-    ).offset(skip).limit(limit).all()
+    )
+    proveedores, next_cursor = paginate(
+        query, [Proveedor.nombre, Proveedor.id], limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, next_cursor)
     return proveedores
 
 @router.post("", response_model=ProveedorResponse, status_code=status.HTTP_201_CREATED)
 async def create_proveedor(
     proveedor_data: ProveedorCreate,
-    current_user: Usuario = Depends(get_farmaceutico_or_admin),
+    current_user: UserPrincipal = Depends(get_farmaceutico_or_admin),
     db: Session = Depends(get_db)
 ):
     """Create new provider"""
@@ -42,7 +48,7 @@ async def create_proveedor(
 @router.get("/{proveedor_id}", response_model=ProveedorResponse)
 async def get_proveedor(
     proveedor_id: str,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get provider by ID"""
@@ -59,7 +65,7 @@ async def get_proveedor(
 async def update_proveedor(
     proveedor_id: str,
     proveedor_data: ProveedorUpdate,
-    current_user: Usuario = Depends(get_farmaceutico_or_admin),
+    current_user: UserPrincipal = Depends(get_farmaceutico_or_admin),
     db: Session = Depends(get_db)
 ):
     """Update provider"""
@@ -86,7 +92,7 @@ async def update_proveedor(
 @router.get("/{proveedor_id}/entradas")
 async def get_proveedor_entradas(
     proveedor_id: str,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get inventory entries related to medications from this provider"""
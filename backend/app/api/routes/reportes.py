@@ -1,215 +1,125 @@
+import os
 from typing import List, Optional
-from datetime import datetime, timedelta
+from uuid import UUID
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-import pandas as pd
-from io import BytesIO
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-
-from app.core.database import get_db
-from app.api.dependencies import get_current_user
-from app.models.user import Usuario
-from app.models.venta import Venta, DetalleVenta
-from app.models.medicamento import Medicamento
-from app.models.inventario import MovimientoInventario
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.api.dependencies import get_current_user, get_admin_user, UserPrincipal
+from app.services.dashboard import load_dashboard_metrics
+from app.models.reporte_job import EstadoReporteJob
+from app.schemas.reporte import ReporteJobCreate, ReporteJobResponse
+from app.services.report_jobs import build_artifact, data_version, get_job, submit_job
+from app.services.report_pool import report_pool
+from app.services.reportes import REPORTES, RENDERERS, CSV_MEDIA_TYPE, stream_report, write_csv
 
 router = APIRouter(prefix="/reportes", tags=["Reportes"])
 
 @router.get("/dashboard")
 async def get_dashboard_metrics(
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtener métricas clave para el dashboard"""
-    today = datetime.now().date()
-    first_day_month = today.replace(day=1)
-
-    # Ventas de hoy
-    ventas_hoy = db.query(func.sum(Venta.total)).filter(
-        Venta.farmacia_id == current_user.farmacia_id,
-        func.date(Venta.fecha_venta) == today
-    ).scalar() or 0
-
-    # Ventas del mes
-    ventas_mes = db.query(func.sum(Venta.total)).filter(
-        Venta.farmacia_id == current_user.farmacia_id,
-        Venta.fecha_venta >= first_day_month
-    ).scalar() or 0
-
-    # Conteo de productos con stock bajo
-    stock_bajo_count = db.query(func.count(Medicamento.id)).filter(
-        Medicamento.farmacia_id == current_user.farmacia_id,
-        Medicamento.activo == True,
-        Medicamento.stock_actual <= Medicamento.stock_minimo
-    ).scalar() or 0
-
-    # Total de productos activos
-    total_productos = db.query(func.count(Medicamento.id)).filter(
-        Medicamento.farmacia_id == current_user.farmacia_id,
-        Medicamento.activo == True
-    ).scalar() or 0
-
-    # Productos más vendidos (Top 5)
-    top_productos = db.query(
-        Medicamento.nombre_comercial,
-        func.sum(DetalleVenta.cantidad).label("vendidos"),
-        func.sum(DetalleVenta.subtotal).label("total_venta")
-    ).join(DetalleVenta, Medicamento.id == DetalleVenta.medicamento_id)\
-     .join(Venta, Venta.id == DetalleVenta.venta_id)\
-     .filter(Venta.farmacia_id == current_user.farmacia_id)\
-     .group_by(Medicamento.id)\
-     .order_by(func.sum(DetalleVenta.cantidad).desc())\
-     .limit(5).all()
-
-    # Formatear top productos
-    top_productos_list = [
-        {"nombre": p[0], "cantidad": p[1], "total": float(p[2])} for p in top_productos
-    ]
+    return await db.run_sync(load_dashboard_metrics, current_user.farmacia_id)
 
-    # Alertas de inventario crítico (Top 5 con menos stock relativo)
-    alertas_inventario = db.query(Medicamento).filter(
-        Medicamento.farmacia_id == current_user.farmacia_id,
-        Medicamento.activo == True,
-        Medicamento.stock_actual <= Medicamento.stock_minimo
-    ).order_by(Medicamento.stock_actual.asc()).limit(5).all()
-
-    alertas_list = [
-        {
-            "nombre": m.nombre_comercial,
-            "stock_actual": m.stock_actual,
-            "stock_minimo": m.stock_minimo
-        } for m in alertas_inventario
-    ]
+def _validar_reporte(tipo: str, formato: str) -> None:
+    if tipo not in REPORTES:
+        raise HTTPException(status_code=400, detail="Tipo de reporte inválido")
+    if formato not in RENDERERS:
+        raise HTTPException(status_code=400, detail="Formato de reporte inválido")
 
-    return {
-        "ventas_hoy": float(ventas_hoy),
-        "ventas_mes": float(ventas_mes),
-        "stock_bajo_count": stock_bajo_count,
-        "total_productos": total_productos,
-        "top_productos": top_productos_list,
-        "alertas_inventario": alertas_list
-    }
+def _filename(tipo: str, formato: str, fecha: datetime) -> str:
+    _, extension, _ = RENDERERS[formato]
+    return f"reporte_{tipo}_{fecha.strftime('%Y%m%d')}.{extension}"
 
 @router.get("/descargar/{tipo}/{formato}")
 async def descargar_reporte(
     tipo: str,
     formato: str,
-    current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Generar y descargar reportes en PDF o Excel"""
-    data = []
-    headers = []
-    filename = f"reporte_{tipo}_{datetime.now().strftime('%Y%m%d')}"
-
-    if tipo == "ventas":
-        # Reporte de ventas de los últimos 30 días
-        ventas = db.query(Venta).filter(
-            Venta.farmacia_id == current_user.farmacia_id,
-            Venta.fecha_venta >= datetime.now() - timedelta(days=30)
-        ).order_by(Venta.fecha_venta.desc()).all()
-        
-        headers = ["Fecha", "N° Venta", "Total", "Método Pago"]
-        data = [[
-            v.fecha_venta.strftime("%Y-%m-%d %H:%M"),
-            v.numero_venta,
-            f"${float(v.total):.2f}",
-            v.metodo_pago
-        ] for v in ventas]
-
-    elif tipo == "inventario":
-        meds = db.query(Medicamento).filter(
-            Medicamento.farmacia_id == current_user.farmacia_id,
-            Medicamento.activo == True
-        ).all()
-        headers = ["Medicamento", "Stock Actual", "Mínimo", "Precio Venta", "Lote"]
-        data = [[
-            m.nombre_comercial,
-            m.stock_actual,
-            m.stock_minimo,
-            f"${float(m.precio_venta):.2f}",
-            m.lote or "N/A"
-        ] for m in meds]
-
-    elif tipo == "vencimientos":
-        # Medicamentos que vencen en los próximos 60 días
-        proximos_vence = db.query(Medicamento).filter(
-            Medicamento.farmacia_id == current_user.farmacia_id,
-            Medicamento.activo == True,
-            Medicamento.fecha_vencimiento <= datetime.now().date() + timedelta(days=60)
-        ).all()
-        headers = ["Medicamento", "Fecha Vencimiento", "Lote", "Stock"]
-        data = [[
-            m.nombre_comercial,
-            m.fecha_vencimiento.strftime("%Y-%m-%d") if m.fecha_vencimiento else "N/A",
-            m.lote or "N/A",
-            m.stock_actual
-        ] for m in proximos_vence]
-
-    elif tipo == "controlados":
-        meds = db.query(Medicamento).filter(
-            Medicamento.farmacia_id == current_user.farmacia_id,
-            Medicamento.activo == True,
-            Medicamento.es_controlado == True
-        ).all()
-        headers = ["Medicamento", "Stock", "Receta Requerida", "Lote"]
-        data = [[
-            m.nombre_comercial,
-            m.stock_actual,
-            "Sí" if m.requiere_receta else "No",
-            m.lote or "N/A"
-        ] for m in meds]
-    else:
-        raise HTTPException(status_code=400, detail="Tipo de reporte inválido")
-
-    if formato == "excel":
-        df = pd.DataFrame(data, columns=headers)
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Reporte')
-        
-        return Response(
-            content=output.getvalue(),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}.xlsx"}
+    """Generar y descargar reportes en PDF, Excel o CSV"""
+    _validar_reporte(tipo, formato)
+    filename = _filename(tipo, formato, datetime.now())
+
+    # CSV is streamed: rows are fetched in batches and written as they arrive
+    if formato == "csv":
+        return StreamingResponse(
+            stream_report(REPORTES[tipo], current_user.farmacia_id, write_csv),
+            media_type=CSV_MEDIA_TYPE,
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
 
-    elif formato == "pdf":
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        elements = []
-        styles = getSampleStyleSheet()
-
-        # Título
-        elements.append(Paragraph(f"Reporte de {tipo.capitalize()}", styles['Title']))
-        elements.append(Spacer(1, 12))
-        elements.append(Paragraph(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal']))
-        elements.append(Paragraph(f"Farmacia ID: {current_user.farmacia_id}", styles['Normal']))
-        elements.append(Spacer(1, 24))
+    # PDF and Excel come from the artifact store, rendered by the report
+    # workers only when the data changed since the last download
+    version = await db.run_sync(data_version, tipo, current_user.farmacia_id)
+    # Give the connection back to the pool while the report renders
+    await db.close()
+    path = await build_artifact(tipo, formato, current_user.farmacia_id, version)
+    _, _, media_type = RENDERERS[formato]
+    return FileResponse(path, media_type=media_type, filename=filename)
+
+@router.post("/jobs", response_model=ReporteJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def crear_reporte_job(
+    job_data: ReporteJobCreate,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Encolar la generación de un reporte; consultar su estado con GET /reportes/jobs/{id}"""
+    _validar_reporte(job_data.tipo, job_data.formato)
+    return await submit_job(db, current_user.farmacia_id, current_user.id, job_data.tipo, job_data.formato)
+
+@router.get("/jobs/{job_id}", response_model=ReporteJobResponse)
+async def get_reporte_job(
+    job_id: UUID,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Estado de un reporte encolado"""
+    job = await get_job(db, job_id, current_user.farmacia_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reporte no encontrado"
+        )
+    return job
 
-        # Tabla
-        table_data = [headers] + data
-        t = Table(table_data)
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        elements.append(t)
-        doc.build(elements)
-        
-        return Response(
-            content=buffer.getvalue(),
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={filename}.pdf"}
+@router.get("/jobs/{job_id}/descargar")
+async def descargar_reporte_job(
+    job_id: UUID,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Descargar el archivo de un reporte completado"""
+    job = await get_job(db, job_id, current_user.farmacia_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reporte no encontrado"
         )
     
-    raise HTTPException(status_code=400, detail="Formato de reporte inválido")
+    if job.estado != EstadoReporteJob.COMPLETADO:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El reporte no está listo (estado: {job.estado.value})"
+        )
+    
+    if not os.path.exists(job.archivo):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="El archivo del reporte expiró, genere uno nuevo"
+        )
+    
+    _, _, media_type = RENDERERS[job.formato]
+    return FileResponse(job.archivo, media_type=media_type, filename=_filename(job.tipo, job.formato, job.created_at))
+
+@router.get("/pool/stats")
+async def get_report_pool_stats(
+    current_user: UserPrincipal = Depends(get_admin_user)
+):
+    """Estado del pool de generación de reportes (cola y workers)"""
+    return report_pool.stats()
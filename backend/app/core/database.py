@@ -1,22 +1,179 @@
-from sqlalchemy import create_engine
+import time
+import uuid
+import logging
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
 from app.core.config import settings
+from app.core.metrics import Histogram
+from app.core.request_metrics import install_query_hooks
+
+# Let the migrations build UUID columns on the SQLite dev database
+@compiles(UUID, "sqlite")
+def compile_uuid_sqlite(type_, compiler, **kw):
+    return "UUID"
+
+class PoolMetrics:
+    """Checkout latency (ms, including pre-ping) and acquire timeouts of one pool"""
+
+    def __init__(self, pool_size: int, max_overflow: int):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.checkout_ms = Histogram()
+        self.timeouts = 0
+
+def _instrumented(pool_class, metrics: PoolMetrics):
+    """Pool class that records every checkout in `metrics`"""
+    class InstrumentedPool(pool_class):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return super().connect()
+            except exc.TimeoutError:
+                metrics.timeouts += 1
+                raise
+            finally:
+                metrics.checkout_ms.observe((time.perf_counter() - start) * 1000)
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
+
+def _pool_options(pool_class, metrics: PoolMetrics) -> dict:
+    if not metrics.pool_size and not metrics.max_overflow:
+        return {"poolclass": _instrumented(NullPool, metrics)}
+    return {
+        "poolclass": _instrumented(pool_class, metrics),
+        "pool_size": metrics.pool_size,
+        "max_overflow": metrics.max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def _pool_metrics(pool_size: int, max_overflow: int) -> PoolMetrics:
+    if settings.DB_TRANSACTION_POOLER:
+        # The pooler multiplexes server connections; holding many idle ones
+        # locally only takes them away from the other workers
+        return PoolMetrics(settings.DB_POOLER_POOL_SIZE, max_overflow if settings.DB_POOLER_POOL_SIZE else 0)
+    return PoolMetrics(pool_size, max_overflow)
+
+sync_pool_metrics = _pool_metrics(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+async_pool_metrics = _pool_metrics(settings.DB_ASYNC_POOL_SIZE, settings.DB_ASYNC_MAX_OVERFLOW)
 
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
-)
+engine = create_engine(settings.DATABASE_URL, **_pool_options(QueuePool, sync_pool_metrics))
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# asyncio drivers for the same databases
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL rewritten for its asyncio driver"""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(hide_password=False)
+
+def async_connect_args(url: str) -> dict:
+    """asyncpg options for a transaction-mode pooler.
+
+    asyncpg prepares every statement and caches it per connection; behind
+    the pooler the next transaction may run on a server connection that
+    never saw it. Disable both statement caches and give each prepared
+    statement a unique name so two clients never collide on one server
+    connection. psycopg2 (sync engine) interpolates parameters client side
+    and needs nothing.
+    """
+    if not settings.DB_TRANSACTION_POOLER or make_url(url).get_backend_name() != "postgresql":
+        return {}
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+    }
+
+# Async engine for the hot routes, so DB round trips do not block the event loop
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    connect_args=async_connect_args(settings.DATABASE_URL),
+    **_pool_options(AsyncAdaptedQueuePool, async_pool_metrics)
+)
+
+# Count SQL statements and time per request (see RequestMetricsMiddleware)
+install_query_hooks(engine, slow_query_ms=settings.SLOW_QUERY_MS)
+install_query_hooks(async_engine.sync_engine, slow_query_ms=settings.SLOW_QUERY_MS)
+
+# Objects stay usable after commit: reloading them lazily is not possible in async code
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def _pool_snapshot(pool: Pool, metrics: PoolMetrics) -> dict:
+    snapshot = {
+        "pool_class": type(pool).__mro__[1].__name__,
+        "pool_size": metrics.pool_size,
+        "max_overflow": metrics.max_overflow,
+        "timeouts": metrics.timeouts,
+        "checkout_ms": metrics.checkout_ms.snapshot()
+    }
+    # NullPool keeps no connections, so there is nothing to count
+    if isinstance(pool, QueuePool):
+        snapshot.update(
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(0, pool.overflow())
+        )
+    return snapshot
+
+def pool_stats() -> dict:
+    """Connection pool usage of this worker, per engine"""
+    return {
+        "transaction_pooler": settings.DB_TRANSACTION_POOLER,
+        "sync": _pool_snapshot(engine.pool, sync_pool_metrics),
+        "async": _pool_snapshot(async_engine.sync_engine.pool, async_pool_metrics)
+    }
+
 # Base class for models
 Base = declarative_base()
 
+# Newest revision in alembic/versions; bump it with every migration
+SCHEMA_REVISION = "0004"
+
+logger = logging.getLogger(__name__)
+
+def check_schema_version(bind) -> None:
+    """Refuse to serve on a database the migrations have not brought up to
+    date. A single SELECT: the schema itself is managed by `alembic upgrade
+    head`, run before rolling out a new version."""
+    try:
+        with bind.connect() as conn:
+            version = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except exc.OperationalError as error:
+        if "alembic_version" not in str(error):
+            # Database unreachable: the pool retries on the first request
+            logger.warning("Could not check the schema version: %s", error)
+            return
+        version = None
+    except exc.ProgrammingError:
+        version = None
+
+    if version is None:
+        raise RuntimeError(
+            "The database has no migration history. Run `alembic upgrade head`; "
+            "a database created before migrations needs `alembic stamp 0001` first"
+        )
+    if version != SCHEMA_REVISION:
+        raise RuntimeError(
+            f"Database schema is at revision {version}, this version needs "
+            f"{SCHEMA_REVISION}: run `alembic upgrade head`"
+        )
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -24,3 +181,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
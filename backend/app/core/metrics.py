@@ -0,0 +1,104 @@
+import bisect
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+# Upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class Histogram:
+    """Thread-safe histogram with fixed upper bounds (Prometheus style)"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        indice = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[indice] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def cumulative(self) -> list:
+        """[(upper bound, observations <= bound)], ending with +Inf"""
+        with self._lock:
+            counts = list(self._counts)
+        acumulado = 0
+        resultado = []
+        for limite, cantidad in zip(self.buckets + (float("inf"),), counts):
+            acumulado += cantidad
+            resultado.append((limite, acumulado))
+        return resultado
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (0 when empty)"""
+        buckets = self.cumulative()
+        total = buckets[-1][1]
+        if not total:
+            return 0.0
+        for limite, acumulado in buckets:
+            if acumulado >= q * total:
+                return limite if limite != float("inf") else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "max": round(self.max, 3),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {("+Inf" if limite == float("inf") else str(limite)): acumulado for limite, acumulado in self.cumulative()}
+        }
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{nombre}="{_escape(valor)}"' for nombre, valor in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class PrometheusWriter:
+    """Builds a Prometheus text exposition (format 0.0.4), keeping the
+    samples of each metric family together"""
+
+    def __init__(self):
+        self._families: Dict[str, Tuple[str, str, List[str]]] = {}
+
+    def _family(self, name: str, tipo: str, ayuda: str) -> List[str]:
+        if name not in self._families:
+            self._families[name] = (tipo, ayuda, [])
+        return self._families[name][2]
+
+    def sample(self, name: str, tipo: str, ayuda: str, value: float, **labels) -> None:
+        self._family(name, tipo, ayuda).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def histogram(self, name: str, ayuda: str, histogram: Histogram, scale: float = 1.0, **labels) -> None:
+        """Histogram samples; `scale` converts recorded units (e.g. ms to seconds)"""
+        lineas = self._family(name, "histogram", ayuda)
+        for limite, acumulado in histogram.cumulative():
+            le = _format_value(limite if scale == 1.0 or limite == float("inf") else limite * scale)
+            lineas.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {acumulado}")
+        lineas.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum * scale)}")
+        lineas.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+    def render(self) -> str:
+        salida = []
+        for name, (tipo, ayuda, lineas) in self._families.items():
+            salida.append(f"# HELP {name} {ayuda}")
+            salida.append(f"# TYPE {name} {tipo}")
+            salida.extend(lineas)
+        return "\n".join(salida) + "\n"
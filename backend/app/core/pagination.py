@@ -0,0 +1,99 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+from app.core.config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def clamp_limit(limit: Optional[int]) -> int:
+    """Page size bounded by settings.MAX_PAGE_SIZE"""
+    if limit is None or limit < 1:
+        return settings.DEFAULT_PAGE_SIZE
+    return min(limit, settings.MAX_PAGE_SIZE)
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque token holding the sort key of the last row of a page"""
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else str(v) for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(columns):
+            raise ValueError("cursor does not match the sort key")
+
+        decoded = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            if python_type in (date, datetime):
+                decoded.append(python_type.fromisoformat(value))
+            else:
+                decoded.append(python_type(value))
+        return decoded
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _keyset_page(query, columns: Sequence, limit: int, cursor: Optional[str], descending: bool, skip: int):
+    """Apply the cursor (or legacy offset), ordering and limit + 1 to a Query or Select"""
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        query = query.filter(key < tuple_(*values) if descending else key > tuple_(*values))
+    elif skip:
+        query = query.offset(skip)
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order).limit(limit + 1)
+
+def _split_page(rows: list, columns: Sequence, limit: int) -> Tuple[list, Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column in columns])
+
+def paginate(
+    query: Query,
+    columns: Sequence,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    skip: int = 0
+) -> Tuple[list, Optional[str]]:
+    """Keyset pagination on a unique, stable sort key (e.g. (fecha_venta, id)).
+
+    Returns the page and the cursor of the next page (None on the last
+    page). Without a cursor the legacy `skip` offset is still honoured so
+    existing clients keep working.
+    """
+    limit = clamp_limit(limit)
+    rows = _keyset_page(query, columns, limit, cursor, descending, skip).all()
+    return _split_page(rows, columns, limit)
+
+async def paginate_async(
+    db: AsyncSession,
+    stmt: Select,
+    columns: Sequence,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    skip: int = 0
+) -> Tuple[list, Optional[str]]:
+    """`paginate` for a select() of one entity run on an AsyncSession"""
+    limit = clamp_limit(limit)
+    result = await db.execute(_keyset_page(stmt, columns, limit, cursor, descending, skip))
+    return _split_page(list(result.scalars()), columns, limit)
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
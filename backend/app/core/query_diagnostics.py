@@ -0,0 +1,61 @@
+import re
+import logging
+from collections import Counter
+from functools import lru_cache
+from typing import Any
+
+logger = logging.getLogger("app.sql")
+
+# "IN (?, ?, ?)" / "VALUES (%(a)s, %(b)s), (...)" differ only in how many
+# parameters were bound; collapse them so they count as one template
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+))*\s*\)")
+_VALUES_ROWS = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+MAX_LOGGED_SQL = 500
+
+@lru_cache(maxsize=2048)
+def statement_template(statement: str) -> str:
+    """SQL text with parameter lists collapsed and whitespace normalized"""
+    plantilla = _WHITESPACE.sub(" ", statement).strip()
+    plantilla = _PLACEHOLDER_LIST.sub("(...)", plantilla)
+    return _VALUES_ROWS.sub(r"\1", plantilla)
+
+def _shape(value: Any) -> str:
+    if value is None:
+        return "None"
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """Types of the bound parameters, never their values (they can hold
+    customer data)"""
+    if executemany:
+        filas = list(parameters) if parameters is not None else []
+        return f"{len(filas)} x {parameter_shape(filas[0]) if filas else '()'}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{nombre}: {_shape(valor)}" for nombre, valor in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(_shape(valor) for valor in parameters) + ")"
+    return _shape(parameters)
+
+def _truncate(sql: str) -> str:
+    return sql if len(sql) <= MAX_LOGGED_SQL else sql[:MAX_LOGGED_SQL] + "..."
+
+def log_slow_statement(statement: str, parameters: Any, executemany: bool, elapsed_ms: float) -> None:
+    logger.warning(
+        "Slow query (%.1f ms): %s | params %s",
+        elapsed_ms, _truncate(statement_template(statement)), parameter_shape(parameters, executemany)
+    )
+
+def report_repeated_statements(method: str, route: str, templates: Counter, threshold: int) -> None:
+    """Warn about templates run more than `threshold` times in one request,
+    the signature of an N+1 (a lazy relationship or a lookup per row)"""
+    for plantilla, veces in templates.most_common():
+        if veces <= threshold:
+            break
+        logger.warning(
+            "Possible N+1 in %s %s: statement ran %d times: %s",
+            method, route, veces, _truncate(plantilla)
+        )
@@ -0,0 +1,165 @@
+import time
+import random
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.metrics import Histogram
+from app.core.query_diagnostics import log_slow_statement, report_repeated_statements, statement_template
+
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+UNMATCHED_ROUTE = "<unmatched>"
+
+@dataclass
+class RequestStats:
+    """SQL work done on behalf of the current request"""
+    statements: int = 0
+    db_ms: float = 0.0
+    # Executions per statement template; only kept for sampled requests
+    templates: Optional[Counter] = None
+
+# Set by the middleware; threadpool and greenlet code run with a copy of
+# the request context, so they all update the same object
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def install_query_hooks(engine: Engine, slow_query_ms: float = 0) -> None:
+    """Count statements and their time against the current request, and
+    log statements slower than `slow_query_ms` (0 disables it)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        stats = current_request.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_ms += elapsed_ms
+            if stats.templates is not None:
+                stats.templates[statement_template(statement)] += 1
+        if slow_query_ms and elapsed_ms >= slow_query_ms:
+            log_slow_statement(statement, parameters, executemany, elapsed_ms)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+class RouteMetrics:
+    def __init__(self):
+        self.duration_ms = Histogram()
+        self.db_ms = Histogram()
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.status: Dict[int, int] = {}
+
+class RequestMetricsRegistry:
+    """Per route latency, SQL and response size histograms for this worker"""
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status: int, duration_ms: float, stats: RequestStats, response_bytes: int) -> None:
+        key = (method, route)
+        metricas = self.routes.get(key)
+        if metricas is None:
+            with self._lock:
+                metricas = self.routes.setdefault(key, RouteMetrics())
+        metricas.duration_ms.observe(duration_ms)
+        metricas.db_ms.observe(stats.db_ms)
+        metricas.statements.observe(stats.statements)
+        metricas.response_bytes.observe(response_bytes)
+        with self._lock:
+            metricas.status[status] = metricas.status.get(status, 0) + 1
+
+request_metrics = RequestMetricsRegistry()
+
+def _route_template(scope) -> str:
+    """Path template of the matched route, so /ventas/{id} is one series"""
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is None or app is None:
+        return UNMATCHED_ROUTE
+    for route in app.routes:
+        if getattr(route, "endpoint", None) is endpoint:
+            return route.path
+    return UNMATCHED_ROUTE
+
+class RequestMetricsMiddleware:
+    """Times every HTTP request and records it in `request_metrics`.
+
+    With `server_timing` set, responses carry a Server-Timing header with
+    the SQL time and statement count up to the moment headers are sent
+    (streamed bodies keep querying after that; /metrics has the full
+    figures).
+
+    A `sample_rate` fraction of requests also count executions per
+    statement template and warn when one runs more than
+    `repeated_statement_threshold` times.
+    """
+
+    def __init__(
+        self,
+        app,
+        server_timing: bool = False,
+        sample_rate: float = 0.0,
+        repeated_statement_threshold: int = 10,
+        registry: RequestMetricsRegistry = request_metrics
+    ):
+        self.app = app
+        self.server_timing = server_timing
+        self.sample_rate = sample_rate
+        self.repeated_statement_threshold = repeated_statement_threshold
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        if self.sample_rate and random.random() < self.sample_rate:
+            stats.templates = Counter()
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        status = 500
+        response_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    total_ms = (time.perf_counter() - start) * 1000
+                    valor = (
+                        f'db;dur={stats.db_ms:.1f};desc="{stats.statements} queries", '
+                        f"app;dur={total_ms:.1f}"
+                    )
+                    message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", valor.encode())]}
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = _route_template(scope)
+            self.registry.observe(
+                scope["method"],
+                route,
+                status,
+                (time.perf_counter() - start) * 1000,
+                stats,
+                response_bytes
+            )
+            if stats.templates:
+                report_repeated_statements(scope["method"], route, stats.templates, self.repeated_statement_threshold)
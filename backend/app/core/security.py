@@ -1,11 +1,31 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from app.core.cache import TTLCache
 from app.core.config import settings
 
-# Password hashing - using pbkdf2_sha256 instead of bcrypt for better compatibility
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Password hashing - using pbkdf2_sha256 instead of bcrypt for better compatibility.
+# min/max rounds pinned to the configured cost, so hashes made with any
+# other cost are flagged for rehashing on the next successful login.
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__max_rounds=settings.PASSWORD_HASH_ROUNDS
+)
+
+# Hashing is deliberately slow CPU work. hashlib releases the GIL while it
+# runs, so a few threads keep it off the event loop without a process pool.
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
@@ -15,6 +35,17 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password in the hashing threads. Returns (valid, new hash),
+    the new hash being set when the stored one uses another cost."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def hash_password(password: str) -> str:
+    """Hash a password in the hashing threads"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -23,7 +54,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # jti identifies the token so it can be revoked (logout)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -34,3 +66,20 @@ def decode_access_token(token: str) -> Optional[dict]:
         return payload
     except JWTError:
         return None
+
+# Tokens whose signature and claims were already checked, each kept until
+# its own expiry
+verified_tokens = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=0)
+
+def verify_access_token(token: str) -> Optional[dict]:
+    """decode_access_token, skipping the signature check for tokens this
+    worker has already verified. Revocation is checked by the caller."""
+    payload = verified_tokens.get(token)
+    if payload is not None:
+        return payload
+    payload = decode_access_token(token)
+    if payload is not None and "exp" in payload:
+        restante = payload["exp"] - time.time()
+        if restante > 0:
+            verified_tokens.set(token, payload, ttl=restante)
+    return payload
@@ -1,11 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import Base, engine
-from app.api.routes import auth, medicamentos, pos, clientes, proveedores, reportes, configuracion
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+from app.core.database import engine, check_schema_version
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.request_metrics import RequestMetricsMiddleware
+from app.api.routes import auth, medicamentos, pos, clientes, proveedores, reportes, configuracion, metrics
+from app.services.report_pool import report_pool
+from app.services.barcode_index import barcode_index
+from app.services.expiry_alerts import expiry_alerts
+from app.services.search_index import search_index
 
 # Create FastAPI app
 app = FastAPI(
@@ -21,8 +24,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Per-route latency, SQL and response size metrics (added last so it
+# wraps everything, CORS preflights included). Server-Timing and query
+# sampling need it even when /metrics itself is off.
+if settings.METRICS_ENABLED or settings.SERVER_TIMING_HEADER or settings.QUERY_SAMPLE_RATE:
+    app.add_middleware(
+        RequestMetricsMiddleware,
+        server_timing=settings.SERVER_TIMING_HEADER,
+        sample_rate=settings.QUERY_SAMPLE_RATE,
+        repeated_statement_threshold=settings.N_PLUS_ONE_THRESHOLD
+    )
+
 # Include routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(medicamentos.router, prefix="/api")
@@ -31,6 +46,29 @@ app.include_router(clientes.router, prefix="/api")
 app.include_router(proveedores.router, prefix="/api")
 app.include_router(reportes.router, prefix="/api")
 app.include_router(configuracion.router, prefix="/api")
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
+
+@app.on_event("startup")
+def check_schema():
+    # The schema is managed by `alembic upgrade head`, run before rollout
+    check_schema_version(engine)
+
+@app.on_event("startup")
+async def start_index_refresh():
+    barcode_index.start()
+    search_index.start()
+    expiry_alerts.start()
+
+@app.on_event("shutdown")
+def shutdown_report_pool():
+    report_pool.shutdown()
+
+@app.on_event("shutdown")
+async def stop_index_refresh():
+    barcode_index.stop()
+    search_index.stop()
+    expiry_alerts.stop()
 
 @app.get("/")
 async def root():
@@ -7,8 +7,12 @@ from app.models.medicamento import Medicamento
 from app.models.cliente import Cliente
 from app.models.inventario import MovimientoInventario, TipoMovimiento
 from app.models.venta import Venta, DetalleVenta, MetodoPago
+from app.models.secuencia import SecuenciaVenta
+from app.models.resumen import ResumenVentasDia, ResumenVentasMedicamento
 from app.models.caja import Caja, EstadoCaja
+from app.models.reporte_job import ReporteJob, EstadoReporteJob
 from app.models.auditoria import Auditoria
+from app.models.token_revocado import TokenRevocado
 
 __all__ = [
     "Base",
@@ -23,7 +27,13 @@ __all__ = [
     "Venta",
     "DetalleVenta",
     "MetodoPago",
+    "SecuenciaVenta",
+    "ResumenVentasDia",
+    "ResumenVentasMedicamento",
     "Caja",
     "EstadoCaja",
+    "ReporteJob",
+    "EstadoReporteJob",
     "Auditoria",
+    "TokenRevocado",
 ]
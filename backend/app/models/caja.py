@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, Numeric, DateTime, Text, Enum, ForeignKey
+from sqlalchemy import Column, Numeric, DateTime, Text, Enum, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -13,6 +13,10 @@ class EstadoCaja(str, enum.Enum):
 
 class Caja(Base):
     __tablename__ = "cajas"
+    __table_args__ = (
+        # Open till lookup on every sale
+        Index("ix_cajas_farmacia_usuario_estado", "farmacia_id", "usuario_id", "estado"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     farmacia_id = Column(UUID(as_uuid=True), ForeignKey("farmacias.id"), nullable=False)
@@ -1,12 +1,16 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class Cliente(Base):
     __tablename__ = "clientes"
+    __table_args__ = (
+        # Client listing (keyset on nombre, id)
+        Index("ix_clientes_farmacia_nombre", "farmacia_id", "nombre", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     farmacia_id = Column(UUID(as_uuid=True), ForeignKey("farmacias.id"), nullable=False)
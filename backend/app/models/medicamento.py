@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, date
-from sqlalchemy import Column, String, Boolean, DateTime, Numeric, Integer, Date, Text, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Numeric, Integer, Date, Text, ForeignKey, DDL, Index, event
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -9,14 +9,14 @@ class Medicamento(Base):
     __tablename__ = "medicamentos"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    farmacia_id = Column(UUID(as_uuid=True), ForeignKey("farmacias.id"), nullable=False, index=True)
+    farmacia_id = Column(UUID(as_uuid=True), ForeignKey("farmacias.id"), nullable=False)
     proveedor_id = Column(UUID(as_uuid=True), ForeignKey("proveedores.id"), nullable=True)
     
-    codigo_barras = Column(String(50), nullable=False, index=True)
-    nombre_comercial = Column(String(200), nullable=False, index=True)
+    codigo_barras = Column(String(50), nullable=False)
+    nombre_comercial = Column(String(200), nullable=False)
     nombre_generico = Column(String(200))
     lote = Column(String(50))
-    fecha_vencimiento = Column(Date, index=True)
+    fecha_vencimiento = Column(Date)
     
     precio_compra = Column(Numeric(10, 2), nullable=False)
     precio_venta = Column(Numeric(10, 2), nullable=False)
@@ -24,7 +24,7 @@ class Medicamento(Base):
     stock_actual = Column(Integer, default=0, nullable=False)
     stock_minimo = Column(Integer, default=10, nullable=False)
     
-    es_controlado = Column(Boolean, default=False, index=True)
+    es_controlado = Column(Boolean, default=False)
     requiere_receta = Column(Boolean, default=False)
     
     categoria = Column(String(100))
@@ -39,3 +39,57 @@ class Medicamento(Base):
     proveedor = relationship("Proveedor", back_populates="medicamentos")
     movimientos = relationship("MovimientoInventario", back_populates="medicamento")
     detalles_venta = relationship("DetalleVenta", back_populates="medicamento")
+
+# Every query is scoped to one pharmacy, so farmacia_id leads each index.
+# Listings, reports and alerts only look at active medications: those
+# indexes are partial, so inactive rows cost nothing. Filters must compare
+# activo with a literal (== True), not a bound parameter, for the
+# planner to match the index predicate.
+_activo = Medicamento.activo == True
+_stock_bajo = Medicamento.stock_actual <= Medicamento.stock_minimo
+
+Index(
+    "uq_medicamentos_farmacia_codigo_barras",
+    Medicamento.farmacia_id, Medicamento.codigo_barras,
+    unique=True
+)
+# Catalog listing (keyset on nombre_comercial, id), inventario and controlados reports
+Index(
+    "ix_medicamentos_activos_nombre",
+    Medicamento.farmacia_id, Medicamento.nombre_comercial, Medicamento.id,
+    postgresql_where=_activo, sqlite_where=_activo
+)
+# vencimientos report
+Index(
+    "ix_medicamentos_activos_vencimiento",
+    Medicamento.farmacia_id, Medicamento.fecha_vencimiento, Medicamento.id,
+    postgresql_where=_activo, sqlite_where=_activo
+)
+# Low stock alerts: only the handful of rows below their minimum are indexed
+Index(
+    "ix_medicamentos_stock_bajo",
+    Medicamento.farmacia_id, Medicamento.stock_actual,
+    postgresql_where=_activo & _stock_bajo, sqlite_where=_activo & _stock_bajo
+)
+
+# Trigram indexes for accent-insensitive search (PostgreSQL only),
+# used by app.services.search_index.search_medicamentos. Created here for
+# create_all (benchmarks) and by migration 0004, which keeps a frozen copy:
+# changing this list needs a new migration.
+TRIGRAM_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() is not IMMUTABLE, so it cannot be used in an index directly
+    "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS "
+    "$$ SELECT public.unaccent('public.unaccent', $1) $$ "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT",
+    "CREATE INDEX IF NOT EXISTS ix_medicamentos_nombre_comercial_trgm ON medicamentos "
+    "USING gin (f_unaccent(lower(nombre_comercial)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_medicamentos_nombre_generico_trgm ON medicamentos "
+    "USING gin (f_unaccent(lower(nombre_generico)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_medicamentos_codigo_barras_trgm ON medicamentos "
+    "USING gin (lower(codigo_barras) gin_trgm_ops)",
+]
+
+for statement in TRIGRAM_SEARCH_DDL:
+    event.listen(Medicamento.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
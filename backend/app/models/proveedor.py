@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import Column, String, Boolean, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy import ForeignKey
@@ -8,6 +8,10 @@ from app.core.database import Base
 
 class Proveedor(Base):
     __tablename__ = "proveedores"
+    __table_args__ = (
+        # Provider listing (keyset on nombre, id)
+        Index("ix_proveedores_farmacia_nombre", "farmacia_id", "nombre", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     farmacia_id = Column(UUID(as_uuid=True), ForeignKey("farmacias.id"), nullable=False)
@@ -0,0 +1,34 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Text, Enum, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+import enum
+
+class EstadoReporteJob(str, enum.Enum):
+    PENDIENTE = "PENDIENTE"
+    EN_PROCESO = "EN_PROCESO"
+    COMPLETADO = "COMPLETADO"
+    ERROR = "ERROR"
+
+class ReporteJob(Base):
+    """Report generation request; the rendered file lives in REPORT_ARTIFACT_DIR"""
+    __tablename__ = "reporte_jobs"
+    __table_args__ = (
+        Index("ix_reporte_jobs_artefacto", "farmacia_id", "tipo", "formato", "version"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    farmacia_id = Column(UUID(as_uuid=True), ForeignKey("farmacias.id"), nullable=False)
+    usuario_id = Column(UUID(as_uuid=True), ForeignKey("usuarios.id"), nullable=False)
+
+    tipo = Column(String(50), nullable=False)
+    formato = Column(String(20), nullable=False)
+    # Fingerprint of the data the report was built from (see report_jobs.data_version)
+    version = Column(String(64), nullable=False)
+    estado = Column(Enum(EstadoReporteJob), nullable=False, default=EstadoReporteJob.PENDIENTE)
+    archivo = Column(String(500))
+    error = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
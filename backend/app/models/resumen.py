@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Numeric, Date, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+class ResumenVentasDia(Base):
+    """Sales totals per pharmacy and day, maintained by crear_venta"""
+    __tablename__ = "resumen_ventas_dia"
+    
+    farmacia_id = Column(UUID(as_uuid=True), ForeignKey("farmacias.id"), primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    
+    num_ventas = Column(Integer, nullable=False, default=0)
+    total = Column(Numeric(12, 2), nullable=False, default=0)
+
+class ResumenVentasMedicamento(Base):
+    """Units and amount sold per pharmacy, day and medication, maintained by crear_venta"""
+    __tablename__ = "resumen_ventas_medicamento"
+    
+    farmacia_id = Column(UUID(as_uuid=True), ForeignKey("farmacias.id"), primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    medicamento_id = Column(UUID(as_uuid=True), ForeignKey("medicamentos.id"), primary_key=True)
+    
+    cantidad = Column(Integer, nullable=False, default=0)
+    subtotal = Column(Numeric(12, 2), nullable=False, default=0)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+class SecuenciaVenta(Base):
+    """Per-pharmacy, per-day counter used to number sales"""
+    __tablename__ = "secuencias_venta"
+    
+    farmacia_id = Column(UUID(as_uuid=True), ForeignKey("farmacias.id"), primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    ultimo_numero = Column(Integer, nullable=False, default=0)
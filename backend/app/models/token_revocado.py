@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+class TokenRevocado(Base):
+    """Access token revoked before its expiry (logout). Rows are only
+    needed until `expira_en`, when the token would be rejected anyway."""
+    __tablename__ = "tokens_revocados"
+    
+    jti = Column(String(32), primary_key=True)
+    # No foreign key: deleting a user must not depend on their old tokens
+    usuario_id = Column(UUID(as_uuid=True), nullable=False)
+    expira_en = Column(DateTime, nullable=False, index=True)
+    # Workers re-read the rows created since their last refresh
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Numeric, DateTime, Text, Enum, Boolean, ForeignKey, Integer, Date
+from sqlalchemy import Column, String, Numeric, DateTime, Text, Enum, Boolean, ForeignKey, Integer, Date, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -14,14 +14,20 @@ class MetodoPago(str, enum.Enum):
 
 class Venta(Base):
     __tablename__ = "ventas"
+    __table_args__ = (
+        # Sale numbers are sequenced per pharmacy
+        UniqueConstraint("farmacia_id", "numero_venta"),
+        # Sales history (keyset on fecha_venta, id) and the ventas report
+        Index("ix_ventas_farmacia_fecha", "farmacia_id", "fecha_venta", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    farmacia_id = Column(UUID(as_uuid=True), ForeignKey("farmacias.id"), nullable=False, index=True)
+    farmacia_id = Column(UUID(as_uuid=True), ForeignKey("farmacias.id"), nullable=False)
     usuario_id = Column(UUID(as_uuid=True), ForeignKey("usuarios.id"), nullable=False, index=True)
     cliente_id = Column(UUID(as_uuid=True), ForeignKey("clientes.id"), nullable=True, index=True)
     caja_id = Column(UUID(as_uuid=True), ForeignKey("cajas.id"), nullable=True)
     
-    numero_venta = Column(String(50), unique=True, nullable=False)
+    numero_venta = Column(String(50), nullable=False)
     subtotal = Column(Numeric(10, 2), nullable=False)
     descuento = Column(Numeric(10, 2), default=0)
     total = Column(Numeric(10, 2), nullable=False)
@@ -32,7 +38,7 @@ class Venta(Base):
     requirio_receta = Column(Boolean, default=False)
     observaciones = Column(Text)
     
-    fecha_venta = Column(DateTime, default=datetime.utcnow, index=True)
+    fecha_venta = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     farmacia = relationship("Farmacia", back_populates="ventas")
@@ -45,7 +51,7 @@ class DetalleVenta(Base):
     __tablename__ = "detalle_ventas"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    venta_id = Column(UUID(as_uuid=True), ForeignKey("ventas.id"), nullable=False)
+    venta_id = Column(UUID(as_uuid=True), ForeignKey("ventas.id"), nullable=False, index=True)
     medicamento_id = Column(UUID(as_uuid=True), ForeignKey("medicamentos.id"), nullable=False)
     
     cantidad = Column(Integer, nullable=False)
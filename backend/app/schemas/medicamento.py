@@ -1,5 +1,5 @@
 from datetime import datetime, date
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, UUID4
 from decimal import Decimal
 
@@ -45,3 +45,16 @@ class MedicamentoResponse(MedicamentoBase):
     
     class Config:
         from_attributes = True
+
+class AlertaVencimientoResponse(BaseModel):
+    id: UUID4
+    nombre_comercial: str
+    lote: Optional[str]
+    fecha_vencimiento: date
+    stock_actual: int
+
+class AlertasVencimientoResponse(BaseModel):
+    vencidos: List[AlertaVencimientoResponse]
+    hasta_30_dias: List[AlertaVencimientoResponse]
+    hasta_60_dias: List[AlertaVencimientoResponse]
+    hasta_90_dias: List[AlertaVencimientoResponse]
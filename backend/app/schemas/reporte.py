@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, UUID4
+from app.models.reporte_job import EstadoReporteJob
+
+class ReporteJobCreate(BaseModel):
+    tipo: str
+    formato: str
+
+class ReporteJobResponse(BaseModel):
+    id: UUID4
+    tipo: str
+    formato: str
+    estado: EstadoReporteJob
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,110 @@
+from typing import Dict, Optional
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.medicamento import Medicamento
+from app.schemas.medicamento import MedicamentoResponse
+from app.services.pharmacy_index import PharmacyIndex
+
+class _FarmaciaBarcodes:
+    """Barcode index of one pharmacy"""
+
+    def __init__(self):
+        self.by_barcode: Dict[str, MedicamentoResponse] = {}
+        self.barcode_by_id: Dict[UUID, str] = {}
+
+    def put(self, medicamento: MedicamentoResponse) -> None:
+        self.remove(medicamento.id)
+        if medicamento.activo:
+            self.by_barcode.setdefault(medicamento.codigo_barras, medicamento)
+            self.barcode_by_id[medicamento.id] = medicamento.codigo_barras
+
+    def remove(self, medicamento_id: UUID) -> None:
+        codigo = self.barcode_by_id.pop(medicamento_id, None)
+        actual = self.by_barcode.get(codigo) if codigo is not None else None
+        if actual is not None and actual.id == medicamento_id:
+            del self.by_barcode[codigo]
+
+class BarcodeIndex(PharmacyIndex[_FarmaciaBarcodes]):
+    """In-process barcode -> active medication index, one per pharmacy.
+
+    A pharmacy's index is loaded on a thread after its first scan; scans
+    arriving before that load finishes query the DB directly instead of
+    waiting for it. The medication and sale endpoints of this worker keep
+    it up to date, and a scheduled refresh reloads every loaded pharmacy
+    every `refresh_interval` seconds to pick up other workers' changes
+    (see PharmacyIndex). Barcodes missing from the index always fall back
+    to the DB.
+    """
+
+    def __init__(self, refresh_interval: float, session_factory=SessionLocal):
+        super().__init__(refresh_interval, session_factory)
+        self.hits = 0
+        self.misses = 0
+
+    def _build(self, db: Session, farmacia_id: UUID) -> _FarmaciaBarcodes:
+        medicamentos = db.query(Medicamento).filter(
+            Medicamento.farmacia_id == farmacia_id,
+            Medicamento.activo == True
+        ).all()
+
+        indice = _FarmaciaBarcodes()
+        for medicamento in medicamentos:
+            indice.put(MedicamentoResponse.model_validate(medicamento))
+        return indice
+
+    def lookup(self, db: Session, farmacia_id: UUID, codigo_barras: str) -> Optional[MedicamentoResponse]:
+        """Find an active medication by barcode, querying the DB only on a miss"""
+        indice = self._get_farmacia(db, farmacia_id)
+        medicamento = indice.by_barcode.get(codigo_barras) if indice is not None else None
+        if medicamento is not None:
+            self.hits += 1
+            return medicamento
+
+        self.misses += 1
+        encontrado = db.query(Medicamento).filter(
+            Medicamento.farmacia_id == farmacia_id,
+            Medicamento.codigo_barras == codigo_barras,
+            Medicamento.activo == True
+        ).first()
+        if encontrado is None:
+            return None
+
+        medicamento = MedicamentoResponse.model_validate(encontrado)
+        self._apply(farmacia_id, lambda indice: indice.put(medicamento))
+        return medicamento
+
+    def put(self, medicamento: Medicamento) -> None:
+        """Add or refresh a medication after it was created or updated"""
+        respuesta = MedicamentoResponse.model_validate(medicamento)
+        self._apply(medicamento.farmacia_id, lambda indice: indice.put(respuesta))
+
+    def apply_stock(self, farmacia_id: UUID, nuevo_stock: Dict[UUID, int]) -> None:
+        """Update cached stock levels after a sale"""
+        def cambio(indice: _FarmaciaBarcodes) -> None:
+            for medicamento_id, stock in nuevo_stock.items():
+                codigo = indice.barcode_by_id.get(medicamento_id)
+                medicamento = indice.by_barcode.get(codigo) if codigo is not None else None
+                if medicamento is not None and medicamento.id == medicamento_id:
+                    indice.by_barcode[codigo] = medicamento.model_copy(update={"stock_actual": stock})
+
+        self._apply(farmacia_id, cambio)
+
+    def stats(self, farmacia_id: Optional[UUID] = None) -> dict:
+        total = self.hits + self.misses
+        if farmacia_id is None:
+            size = sum(len(indice.by_barcode) for indice in self._farmacias.values())
+        else:
+            indice = self._farmacias.get(farmacia_id)
+            size = len(indice.by_barcode) if indice is not None else 0
+        return {
+            "size": size,
+            "farmacias": len(self._farmacias),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "refreshes": self.refreshes
+        }
+
+barcode_index = BarcodeIndex(refresh_interval=settings.BARCODE_INDEX_REFRESH_SECONDS)
@@ -0,0 +1,106 @@
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import case, func, select, true
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.medicamento import Medicamento
+from app.models.resumen import ResumenVentasDia, ResumenVentasMedicamento
+from app.services.expiry_alerts import expiry_alerts
+
+# Dashboard metrics by farmacia_id. crear_venta and the medication
+# endpoints invalidate their pharmacy; the TTL covers other workers.
+dashboard_cache = TTLCache(maxsize=1024, ttl=settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+def invalidate_dashboard(farmacia_id: UUID) -> None:
+    dashboard_cache.invalidate(farmacia_id)
+
+def _compute_metrics(db: Session, farmacia_id: UUID) -> dict:
+    today = datetime.now().date()
+
+    stock_bajo = Medicamento.stock_actual <= Medicamento.stock_minimo
+
+    # Scalar metrics in one round trip. Sales come from the daily rollup,
+    # so the cost does not grow with the number of sales.
+    ventas = select(
+        func.coalesce(func.sum(case(
+            (ResumenVentasDia.fecha == today, ResumenVentasDia.total)
+        )), 0).label("ventas_hoy"),
+        func.coalesce(func.sum(ResumenVentasDia.total), 0).label("ventas_mes")
+    ).where(
+        ResumenVentasDia.farmacia_id == farmacia_id,
+        ResumenVentasDia.fecha >= today.replace(day=1),
+        ResumenVentasDia.fecha <= today
+    ).subquery()
+
+    productos = select(
+        func.count(Medicamento.id).label("total_productos"),
+        func.coalesce(func.sum(case((stock_bajo, 1), else_=0)), 0).label("stock_bajo_count")
+    ).where(
+        Medicamento.farmacia_id == farmacia_id,
+        Medicamento.activo == True
+    ).subquery()
+
+    metricas = db.execute(
+        select(ventas, productos).select_from(ventas.join(productos, true()))
+    ).one()
+
+    # Productos más vendidos (Top 5)
+    top_productos = db.query(
+        Medicamento.nombre_comercial,
+        func.sum(ResumenVentasMedicamento.cantidad).label("vendidos"),
+        func.sum(ResumenVentasMedicamento.subtotal).label("total_venta")
+    ).join(ResumenVentasMedicamento, Medicamento.id == ResumenVentasMedicamento.medicamento_id)\
+     .filter(ResumenVentasMedicamento.farmacia_id == farmacia_id)\
+     .group_by(Medicamento.id, Medicamento.nombre_comercial)\
+     .order_by(func.sum(ResumenVentasMedicamento.cantidad).desc())\
+     .limit(5).all()
+
+    # Alertas de inventario crítico (Top 5 con menos stock)
+    alertas_inventario = db.query(
+        Medicamento.nombre_comercial,
+        Medicamento.stock_actual,
+        Medicamento.stock_minimo
+    ).filter(
+        Medicamento.farmacia_id == farmacia_id,
+        Medicamento.activo == True,
+        stock_bajo
+    ).order_by(Medicamento.stock_actual.asc()).limit(5).all()
+
+    # Alertas de vencimiento, del índice en memoria (sin consulta)
+    vencimientos = expiry_alerts.buckets(db, farmacia_id)
+    proximos_vencer = expiry_alerts.expiring_within(db, farmacia_id, settings.DIAS_ALERTA_VENCIMIENTO)
+
+    return {
+        "ventas_hoy": float(metricas.ventas_hoy),
+        "ventas_mes": float(metricas.ventas_mes),
+        "stock_bajo_count": metricas.stock_bajo_count,
+        "total_productos": metricas.total_productos,
+        "top_productos": [
+            {"nombre": p[0], "cantidad": p[1], "total": float(p[2])} for p in top_productos
+        ],
+        "alertas_inventario": [
+            {
+                "nombre": m.nombre_comercial,
+                "stock_actual": m.stock_actual,
+                "stock_minimo": m.stock_minimo
+            } for m in alertas_inventario
+        ],
+        "vencimientos_count": {nombre: len(alertas) for nombre, alertas in vencimientos.items()},
+        "alertas_vencimiento": [
+            {
+                "nombre": a.nombre_comercial,
+                "lote": a.lote,
+                "fecha_vencimiento": a.fecha_vencimiento.isoformat(),
+                "stock_actual": a.stock_actual
+            } for a in proximos_vencer[:5]
+        ]
+    }
+
+def load_dashboard_metrics(db: Session, farmacia_id: UUID) -> dict:
+    """Dashboard metrics for a pharmacy, served from a short-lived cache"""
+    metricas = dashboard_cache.get(farmacia_id)
+    if metricas is None:
+        metricas = _compute_metrics(db, farmacia_id)
+        dashboard_cache.set(farmacia_id, metricas)
+    return metricas
@@ -0,0 +1,156 @@
+import bisect
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.medicamento import Medicamento
+from app.services.pharmacy_index import PharmacyIndex
+
+# Alert buckets: expired, then "expires within N days" (exclusive of the
+# previous bucket). The vencimientos report and the dashboard use the same
+# horizons.
+EXPIRY_BUCKET_DAYS = (30, 60, 90)
+BUCKET_NAMES = ["vencidos"] + [f"hasta_{dias}_dias" for dias in EXPIRY_BUCKET_DAYS]
+# Medications further out than this are not held at all
+HORIZON_DAYS = max(EXPIRY_BUCKET_DAYS[-1], settings.DIAS_ALERTA_VENCIMIENTO)
+
+@dataclass(frozen=True)
+class AlertaVencimiento:
+    id: UUID
+    nombre_comercial: str
+    lote: Optional[str]
+    fecha_vencimiento: date
+    stock_actual: int
+
+    @classmethod
+    def from_medicamento(cls, medicamento) -> "AlertaVencimiento":
+        return cls(
+            id=medicamento.id,
+            nombre_comercial=medicamento.nombre_comercial,
+            lote=medicamento.lote,
+            fecha_vencimiento=medicamento.fecha_vencimiento,
+            stock_actual=medicamento.stock_actual
+        )
+
+def _orden(alerta: AlertaVencimiento) -> Tuple[date, str]:
+    return (alerta.fecha_vencimiento, str(alerta.id))
+
+def _fecha(alerta: AlertaVencimiento) -> date:
+    return alerta.fecha_vencimiento
+
+class _FarmaciaAlertas:
+    """Alerts of one pharmacy, sorted by expiry date"""
+
+    def __init__(self, loaded_on: date, alertas: Iterable[AlertaVencimiento] = ()):
+        self.loaded_on = loaded_on
+        self.alertas: List[AlertaVencimiento] = sorted(alertas, key=_orden)
+        self.by_id: Dict[UUID, AlertaVencimiento] = {alerta.id: alerta for alerta in self.alertas}
+
+    def put(self, alerta: AlertaVencimiento) -> None:
+        self.remove(alerta.id)
+        bisect.insort(self.alertas, alerta, key=_orden)
+        self.by_id[alerta.id] = alerta
+
+    def remove(self, medicamento_id: UUID) -> None:
+        alerta = self.by_id.pop(medicamento_id, None)
+        if alerta is not None:
+            del self.alertas[bisect.bisect_left(self.alertas, _orden(alerta), key=_orden)]
+
+    def until(self, fecha: date) -> int:
+        """Position after the last alert expiring on or before `fecha`"""
+        return bisect.bisect_right(self.alertas, fecha, key=_fecha)
+
+class ExpiryAlertIndex(PharmacyIndex[_FarmaciaAlertas]):
+    """In-process expiry alerts, one sorted list per pharmacy.
+
+    Holds the active medications expiring within HORIZON_DAYS (or already
+    expired), so reading the alerts costs O(alerts) and no query. A
+    pharmacy is loaded (on the partial ix_medicamentos_activos_vencimiento
+    index) on a thread after its first read; reads before that load
+    finishes run the same query directly. The medication and sale
+    endpoints of this worker keep it up to date; a scheduled refresh every
+    `refresh_interval` seconds picks up other workers' changes, and the
+    first read of a new day starts a reload so medications entering the
+    horizon show up (see PharmacyIndex).
+    """
+
+    def __init__(self, refresh_interval: float, clock: Callable[[], date] = date.today, session_factory=SessionLocal):
+        super().__init__(refresh_interval, session_factory)
+        self.clock = clock
+
+    def _build(self, db: Session, farmacia_id: UUID) -> _FarmaciaAlertas:
+        hoy = self.clock()
+        medicamentos = db.query(
+            Medicamento.id, Medicamento.nombre_comercial, Medicamento.lote,
+            Medicamento.fecha_vencimiento, Medicamento.stock_actual
+        ).filter(
+            Medicamento.farmacia_id == farmacia_id,
+            Medicamento.activo == True,
+            Medicamento.fecha_vencimiento <= hoy + timedelta(days=HORIZON_DAYS)
+        ).order_by(Medicamento.fecha_vencimiento, Medicamento.id).all()
+
+        return _FarmaciaAlertas(hoy, map(AlertaVencimiento.from_medicamento, medicamentos))
+
+    def _is_current(self, indice: _FarmaciaAlertas) -> bool:
+        return indice.loaded_on == self.clock()
+
+    def _alertas(self, db: Session, farmacia_id: UUID) -> _FarmaciaAlertas:
+        """The pharmacy's alerts, read from the DB until its index is loaded"""
+        indice = self._get_farmacia(db, farmacia_id)
+        return indice if indice is not None else self._build(db, farmacia_id)
+
+    def buckets(self, db: Session, farmacia_id: UUID) -> Dict[str, List[AlertaVencimiento]]:
+        """Alerts by bucket (BUCKET_NAMES), soonest expiry first"""
+        indice = self._alertas(db, farmacia_id)
+        hoy = self.clock()
+        with self._lock:
+            limites = [0, indice.until(hoy - timedelta(days=1))]
+            limites += [indice.until(hoy + timedelta(days=dias)) for dias in EXPIRY_BUCKET_DAYS]
+            return {
+                nombre: indice.alertas[inicio:fin]
+                for nombre, inicio, fin in zip(BUCKET_NAMES, limites, limites[1:])
+            }
+
+    def expiring_within(self, db: Session, farmacia_id: UUID, dias: int) -> List[AlertaVencimiento]:
+        """Not yet expired alerts expiring within `dias` days"""
+        indice = self._alertas(db, farmacia_id)
+        hoy = self.clock()
+        with self._lock:
+            inicio = indice.until(hoy - timedelta(days=1))
+            return indice.alertas[inicio:indice.until(hoy + timedelta(days=dias))]
+
+    def put(self, medicamento: Medicamento) -> None:
+        """Add, move or drop a medication after it was created or updated"""
+        alerta = AlertaVencimiento.from_medicamento(medicamento)
+        activo = medicamento.activo
+
+        def cambio(indice: _FarmaciaAlertas) -> None:
+            limite = indice.loaded_on + timedelta(days=HORIZON_DAYS)
+            if activo and alerta.fecha_vencimiento is not None and alerta.fecha_vencimiento <= limite:
+                indice.put(alerta)
+            else:
+                indice.remove(alerta.id)
+
+        self._apply(medicamento.farmacia_id, cambio)
+
+    def apply_stock(self, farmacia_id: UUID, nuevo_stock: Dict[UUID, int]) -> None:
+        """Update the stock shown with the alerts after a sale"""
+        def cambio(indice: _FarmaciaAlertas) -> None:
+            for medicamento_id, stock in nuevo_stock.items():
+                alerta = indice.by_id.get(medicamento_id)
+                if alerta is not None:
+                    indice.put(replace(alerta, stock_actual=stock))
+
+        self._apply(farmacia_id, cambio)
+
+    def stats(self) -> dict:
+        return {
+            "size": sum(len(indice.alertas) for indice in self._farmacias.values()),
+            "farmacias": len(self._farmacias),
+            "refreshes": self.refreshes
+        }
+
+expiry_alerts = ExpiryAlertIndex(refresh_interval=settings.EXPIRY_ALERTS_REFRESH_SECONDS)
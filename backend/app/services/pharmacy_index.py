@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, Generic, List, Optional, Set, TypeVar
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class PharmacyIndex(Generic[T]):
+    """Base of the in-process per-pharmacy indexes (barcodes, search, expiry alerts).
+
+    Holds one snapshot per pharmacy, built by `_build`. Loads never run on
+    the event loop: a pharmacy missing from the index, or whose snapshot is
+    no longer current (`_is_current`), is (re)loaded on a thread with its
+    own session while reads keep using the previous snapshot, or return
+    None for the caller to query the DB directly. The scheduled refresh
+    reloads every pharmacy held every `refresh_interval` seconds, also on a
+    thread, to pick up other workers' changes.
+
+    Writers go through `_apply`: the change is applied to the current
+    snapshot and recorded for any load in progress, which replays it onto
+    the new snapshot before installing it, so a change made mid-load is
+    not lost. Outside an event loop (scripts, benchmarks) loads run inline.
+    """
+
+    def __init__(self, refresh_interval: float, session_factory: Callable[[], Session] = SessionLocal):
+        self.refresh_interval = refresh_interval
+        self.session_factory = session_factory
+        self.refreshes = 0
+        self._farmacias: Dict[UUID, T] = {}
+        # Pharmacies being (re)loaded, with the changes made meanwhile
+        self._loading: Dict[UUID, List[Callable[[T], None]]] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
+
+    def _build(self, db: Session, farmacia_id: UUID) -> T:
+        """Snapshot of one pharmacy, read from the database"""
+        raise NotImplementedError
+
+    def _is_current(self, indice: T) -> bool:
+        return True
+
+    def _begin_load(self, farmacia_id: UUID) -> bool:
+        """Claim the (re)load of a pharmacy; False if one is already running"""
+        with self._lock:
+            if farmacia_id in self._loading:
+                return False
+            self._loading[farmacia_id] = []
+            return True
+
+    def _load(self, db: Session, farmacia_id: UUID) -> T:
+        """Load a pharmacy claimed with _begin_load"""
+        try:
+            indice = self._build(db, farmacia_id)
+            with self._lock:
+                for cambio in self._loading[farmacia_id]:
+                    cambio(indice)
+                self._farmacias[farmacia_id] = indice
+            return indice
+        finally:
+            with self._lock:
+                self._loading.pop(farmacia_id, None)
+
+    def _load_with_own_session(self, farmacia_id: UUID) -> None:
+        db = self.session_factory()
+        try:
+            self._load(db, farmacia_id)
+        finally:
+            db.close()
+
+    def _background_done(self, tarea: asyncio.Task) -> None:
+        self._background.discard(tarea)
+        if not tarea.cancelled() and tarea.exception() is not None:
+            logger.error("%s load failed", type(self).__name__, exc_info=tarea.exception())
+
+    def _get_farmacia(self, db: Session, farmacia_id: UUID) -> Optional[T]:
+        """The pharmacy's snapshot, starting a (re)load if it is missing or stale.
+
+        May return a stale snapshot, or None while the first load runs.
+        """
+        indice = self._farmacias.get(farmacia_id)
+        if indice is not None and self._is_current(indice):
+            return indice
+        if not self._begin_load(farmacia_id):
+            return indice
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self._load(db, farmacia_id)
+        tarea = loop.create_task(asyncio.to_thread(self._load_with_own_session, farmacia_id))
+        self._background.add(tarea)
+        tarea.add_done_callback(self._background_done)
+        return indice
+
+    def _apply(self, farmacia_id: UUID, cambio: Callable[[T], None]) -> None:
+        """Apply a change to the pharmacy's snapshot and to any load in progress"""
+        with self._lock:
+            indice = self._farmacias.get(farmacia_id)
+            if indice is not None:
+                cambio(indice)
+            pendientes = self._loading.get(farmacia_id)
+            if pendientes is not None:
+                pendientes.append(cambio)
+
+    def refresh(self) -> None:
+        """Reload every pharmacy held (the scheduled job, run on a thread)"""
+        db = self.session_factory()
+        try:
+            for farmacia_id in list(self._farmacias):
+                if self._begin_load(farmacia_id):
+                    self._load(db, farmacia_id)
+        finally:
+            db.close()
+        self.refreshes += 1
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception:
+                logger.exception("%s refresh failed", type(self).__name__)
+
+    def start(self) -> None:
+        """Start the scheduled refresh on the running event loop"""
+        if self._task is None and self.refresh_interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def invalidate(self, farmacia_id: Optional[UUID] = None) -> None:
+        with self._lock:
+            if farmacia_id is None:
+                self._farmacias.clear()
+            else:
+                self._farmacias.pop(farmacia_id, None)
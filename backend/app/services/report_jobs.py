@@ -0,0 +1,176 @@
+import os
+import time
+import asyncio
+import hashlib
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Set
+from uuid import UUID
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.reporte_job import ReporteJob, EstadoReporteJob
+from app.services.report_pool import report_pool
+from app.services.reportes import REPORTES, RENDERERS
+
+EN_CURSO = (EstadoReporteJob.PENDIENTE, EstadoReporteJob.EN_PROCESO)
+
+# Renders in flight in this process, by artifact path, so concurrent
+# requests for the same report share one render
+_building: Dict[str, asyncio.Task] = {}
+# Keep a reference to running jobs so they are not garbage collected
+_jobs: Set[asyncio.Task] = set()
+
+def data_version(db: Session, tipo: str, farmacia_id: UUID) -> str:
+    """Fingerprint of the rows a report would contain right now.
+
+    Row count plus the newest change timestamp over the report's own
+    query, and today's date (the ventas and vencimientos windows move
+    with it). Any sale, or any edit or stock change of a listed
+    medication, gives a new version.
+    """
+    reporte = REPORTES[tipo]
+    filas, ultimo_cambio = reporte.query(db, farmacia_id).order_by(None).with_entities(
+        func.count(), func.max(reporte.version_column)
+    ).one()
+    huella = f"{tipo}|{date.today().isoformat()}|{filas}|{ultimo_cambio}"
+    return hashlib.sha1(huella.encode()).hexdigest()[:16]
+
+def artifact_path(farmacia_id: UUID, tipo: str, formato: str, version: str) -> str:
+    _, extension, _ = RENDERERS[formato]
+    return os.path.join(settings.REPORT_ARTIFACT_DIR, f"{farmacia_id}_{tipo}_{formato}_{version}.{extension}")
+
+def prune_artifacts() -> None:
+    """Delete artifacts older than REPORT_ARTIFACT_TTL_SECONDS"""
+    limite = time.time() - settings.REPORT_ARTIFACT_TTL_SECONDS
+    with os.scandir(settings.REPORT_ARTIFACT_DIR) as entradas:
+        for entrada in entradas:
+            try:
+                if entrada.is_file() and entrada.stat().st_mtime < limite:
+                    os.unlink(entrada.path)
+            except FileNotFoundError:
+                pass
+
+async def _render_artifact(tipo: str, formato: str, farmacia_id: UUID, version: str, destino: str) -> str:
+    os.makedirs(settings.REPORT_ARTIFACT_DIR, exist_ok=True)
+    temporal = await report_pool.render(tipo, formato, farmacia_id, directorio=settings.REPORT_ARTIFACT_DIR)
+    # `version` was computed before the render query ran: a change committed
+    # in between may or may not be in the file, so it is only stored under
+    # that version if the data did not move meanwhile. Otherwise the caller
+    # gets the rendered file as is, and prune_artifacts deletes it later.
+    async with AsyncSessionLocal() as db:
+        actual = await db.run_sync(data_version, tipo, farmacia_id)
+    if actual == version:
+        os.replace(temporal, destino)
+    prune_artifacts()
+    return destino if actual == version else temporal
+
+async def build_artifact(tipo: str, formato: str, farmacia_id: UUID, version: str) -> str:
+    """Path of the report file for this data version, rendering it only if
+    no stored artifact exists yet (see _render_artifact)"""
+    destino = artifact_path(farmacia_id, tipo, formato, version)
+    if os.path.exists(destino):
+        return destino
+
+    tarea = _building.get(destino)
+    if tarea is None:
+        tarea = asyncio.ensure_future(_render_artifact(tipo, formato, farmacia_id, version, destino))
+        _building[destino] = tarea
+        tarea.add_done_callback(lambda _: _building.pop(destino, None))
+    # One caller disconnecting must not cancel the render for the others
+    return await asyncio.shield(tarea)
+
+def _is_stale(job: ReporteJob) -> bool:
+    return (
+        job.estado in EN_CURSO
+        and job.created_at < datetime.utcnow() - timedelta(seconds=settings.REPORT_JOB_TIMEOUT_SECONDS)
+    )
+
+async def _finish_job(job_id: UUID, estado: EstadoReporteJob, archivo: Optional[str] = None, error: Optional[str] = None) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(ReporteJob)
+            .where(ReporteJob.id == job_id)
+            .values(estado=estado, archivo=archivo, error=error, finished_at=datetime.utcnow())
+        )
+        await db.commit()
+
+async def _mark_running(job_id: UUID) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(ReporteJob)
+            .where(ReporteJob.id == job_id)
+            .values(estado=EstadoReporteJob.EN_PROCESO)
+        )
+        await db.commit()
+
+async def _run_job(job_id: UUID, tipo: str, formato: str, farmacia_id: UUID, version: str) -> None:
+    await _mark_running(job_id)
+    try:
+        archivo = await build_artifact(tipo, formato, farmacia_id, version)
+    except Exception as e:
+        await _finish_job(job_id, EstadoReporteJob.ERROR, error=str(e) or type(e).__name__)
+    else:
+        await _finish_job(job_id, EstadoReporteJob.COMPLETADO, archivo=archivo)
+
+async def submit_job(db: AsyncSession, farmacia_id: UUID, usuario_id: UUID, tipo: str, formato: str) -> ReporteJob:
+    """Queue a report job, or return an equivalent one.
+
+    A job for the same (farmacia, tipo, formato, data version) that is
+    still running, or finished with its artifact still on disk, is
+    returned as is.
+    """
+    version = await db.run_sync(data_version, tipo, farmacia_id)
+
+    result = await db.execute(select(ReporteJob).where(
+        ReporteJob.farmacia_id == farmacia_id,
+        ReporteJob.tipo == tipo,
+        ReporteJob.formato == formato,
+        ReporteJob.version == version,
+        ReporteJob.estado.in_(EN_CURSO + (EstadoReporteJob.COMPLETADO,))
+    ).order_by(ReporteJob.created_at.desc()).limit(1))
+    existente = result.scalars().first()
+    if existente is not None and not _is_stale(existente):
+        if existente.estado in EN_CURSO or os.path.exists(existente.archivo):
+            return existente
+
+    job = ReporteJob(
+        farmacia_id=farmacia_id,
+        usuario_id=usuario_id,
+        tipo=tipo,
+        formato=formato,
+        version=version,
+        created_at=datetime.utcnow()
+    )
+
+    # Served straight from the artifact store when another download built it
+    archivo = artifact_path(farmacia_id, tipo, formato, version)
+    if os.path.exists(archivo):
+        job.estado = EstadoReporteJob.COMPLETADO
+        job.archivo = archivo
+        job.finished_at = job.created_at
+        db.add(job)
+        await db.commit()
+        return job
+
+    db.add(job)
+    await db.commit()
+    tarea = asyncio.get_running_loop().create_task(_run_job(job.id, tipo, formato, farmacia_id, version))
+    _jobs.add(tarea)
+    tarea.add_done_callback(_jobs.discard)
+    return job
+
+async def get_job(db: AsyncSession, job_id: UUID, farmacia_id: UUID) -> Optional[ReporteJob]:
+    """A pharmacy's job; jobs whose process died are reported as failed"""
+    result = await db.execute(select(ReporteJob).where(
+        ReporteJob.id == job_id,
+        ReporteJob.farmacia_id == farmacia_id
+    ))
+    job = result.scalars().first()
+    if job is not None and _is_stale(job):
+        job.estado = EstadoReporteJob.ERROR
+        job.error = "Tiempo de espera agotado"
+        job.finished_at = datetime.utcnow()
+        await db.commit()
+    return job
@@ -0,0 +1,121 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+from uuid import UUID
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.services.reportes import preload_renderers, render_report_file
+
+class ReportPool:
+    """Renders reports in a bounded pool of worker processes.
+
+    reportlab/openpyxl rendering is CPU-bound; running it in the API
+    process would block the event loop (or hold the GIL in a thread) and
+    stall POS requests. Each pharmacy may have at most `max_per_farmacia`
+    reports rendering or queued for a worker at a time; further requests
+    wait their turn, and once `max_queue` requests are waiting new ones
+    are rejected with 503.
+    """
+
+    def __init__(self, workers: int, max_per_farmacia: int, max_queue: int):
+        self.workers = workers
+        self.max_per_farmacia = max_per_farmacia
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Per-pharmacy slots, kept only while a request holds or waits for
+        # one (with the number of such requests), so idle pharmacies cost nothing
+        self._semaphores: Dict[UUID, asyncio.Semaphore] = {}
+        self._users: Dict[UUID, int] = {}
+        self._waiting = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: workers must not inherit the API process's DB connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=preload_renderers
+                )
+            return self._executor
+
+    def queue_depth(self) -> int:
+        """Requests waiting for their pharmacy's slot or for a free worker"""
+        return self._waiting + max(0, self._submitted - self.workers)
+
+    async def render(self, tipo: str, formato: str, farmacia_id: UUID, directorio: Optional[str] = None) -> str:
+        """Render a report in a worker process and return the file path"""
+        if self.queue_depth() >= self.max_queue:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Demasiados reportes en cola, intente de nuevo en unos momentos",
+                headers={"Retry-After": "5"}
+            )
+
+        semaphore = self._semaphores.get(farmacia_id)
+        if semaphore is None:
+            semaphore = self._semaphores[farmacia_id] = asyncio.Semaphore(self.max_per_farmacia)
+        self._users[farmacia_id] = self._users.get(farmacia_id, 0) + 1
+        try:
+            self._waiting += 1
+            try:
+                await semaphore.acquire()
+            finally:
+                self._waiting -= 1
+
+            self._submitted += 1
+            try:
+                loop = asyncio.get_running_loop()
+                path = await loop.run_in_executor(
+                    self._get_executor(), render_report_file, tipo, formato, farmacia_id, directorio
+                )
+                self._completed += 1
+                return path
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed): start a fresh pool for the next report
+                self._failed += 1
+                self.shutdown()
+                raise
+            except Exception:
+                self._failed += 1
+                raise
+            finally:
+                self._submitted -= 1
+                semaphore.release()
+        finally:
+            self._users[farmacia_id] -= 1
+            if not self._users[farmacia_id]:
+                del self._users[farmacia_id]
+                del self._semaphores[farmacia_id]
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": min(self._submitted, self.workers),
+            "queue_depth": self.queue_depth(),
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "farmacias": len(self._semaphores)
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+report_pool = ReportPool(
+    workers=settings.REPORT_WORKERS,
+    max_per_farmacia=settings.REPORT_MAX_CONCURRENT_PER_FARMACIA,
+    max_queue=settings.REPORT_MAX_QUEUE
+)
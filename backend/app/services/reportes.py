@@ -0,0 +1,301 @@
+import csv
+import io
+import os
+import tempfile
+import importlib
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from datetime import datetime, timedelta
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional
+from uuid import UUID
+from sqlalchemy.orm import Query, Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.venta import Venta
+from app.models.medicamento import Medicamento
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Starlette appends "; charset=utf-8" to text/* types itself
+CSV_MEDIA_TYPE = "text/csv"
+PDF_MEDIA_TYPE = "application/pdf"
+
+# openpyxl and reportlab are imported by the renderers that use them: they
+# add a few hundred ms and tens of MB to every API worker otherwise, and
+# excel/pdf only ever render in the report pool processes
+RENDERER_MODULES = ["openpyxl", "reportlab.platypus", "reportlab.lib.styles"]
+
+def preload_renderers() -> None:
+    """Import the renderer libraries up front (report worker initializer)"""
+    for modulo in RENDERER_MODULES:
+        importlib.import_module(modulo)
+
+@dataclass(frozen=True)
+class ReportDefinition:
+    headers: List[str]
+    query: Callable[[Session, UUID], Query]
+    format_row: Callable[[object], list]
+    # Newest value changes whenever a row of the report changes
+    version_column: object
+
+def _valor(enum_or_str) -> str:
+    return getattr(enum_or_str, "value", enum_or_str)
+
+def _ventas_query(db: Session, farmacia_id: UUID) -> Query:
+    # Reporte de ventas de los últimos 30 días
+    return db.query(
+        Venta.fecha_venta, Venta.numero_venta, Venta.total, Venta.metodo_pago
+    ).filter(
+        Venta.farmacia_id == farmacia_id,
+        Venta.fecha_venta >= datetime.now() - timedelta(days=30)
+    ).order_by(Venta.fecha_venta.desc(), Venta.id.desc())
+
+def _inventario_query(db: Session, farmacia_id: UUID) -> Query:
+    return db.query(
+        Medicamento.nombre_comercial, Medicamento.stock_actual, Medicamento.stock_minimo,
+        Medicamento.precio_venta, Medicamento.lote
+    ).filter(
+        Medicamento.farmacia_id == farmacia_id,
+        Medicamento.activo == True
+    ).order_by(Medicamento.nombre_comercial, Medicamento.id)
+
+def _vencimientos_query(db: Session, farmacia_id: UUID) -> Query:
+    # Medicamentos vencidos o que vencen en los próximos DIAS_ALERTA_VENCIMIENTO días
+    return db.query(
+        Medicamento.nombre_comercial, Medicamento.fecha_vencimiento, Medicamento.lote,
+        Medicamento.stock_actual
+    ).filter(
+        Medicamento.farmacia_id == farmacia_id,
+        Medicamento.activo == True,
+        Medicamento.fecha_vencimiento <= datetime.now().date() + timedelta(days=settings.DIAS_ALERTA_VENCIMIENTO)
+    ).order_by(Medicamento.fecha_vencimiento, Medicamento.id)
+
+def _controlados_query(db: Session, farmacia_id: UUID) -> Query:
+    return db.query(
+        Medicamento.nombre_comercial, Medicamento.stock_actual, Medicamento.requiere_receta,
+        Medicamento.lote
+    ).filter(
+        Medicamento.farmacia_id == farmacia_id,
+        Medicamento.activo == True,
+        Medicamento.es_controlado == True
+    ).order_by(Medicamento.nombre_comercial, Medicamento.id)
+
+REPORTES: Dict[str, ReportDefinition] = {
+    "ventas": ReportDefinition(
+        headers=["Fecha", "N° Venta", "Total", "Método Pago"],
+        query=_ventas_query,
+        version_column=Venta.fecha_venta,
+        format_row=lambda v: [
+            v.fecha_venta.strftime("%Y-%m-%d %H:%M"),
+            v.numero_venta,
+            f"${float(v.total):.2f}",
+            _valor(v.metodo_pago)
+        ]
+    ),
+    "inventario": ReportDefinition(
+        headers=["Medicamento", "Stock Actual", "Mínimo", "Precio Venta", "Lote"],
+        query=_inventario_query,
+        version_column=Medicamento.updated_at,
+        format_row=lambda m: [
+            m.nombre_comercial,
+            m.stock_actual,
+            m.stock_minimo,
+            f"${float(m.precio_venta):.2f}",
+            m.lote or "N/A"
+        ]
+    ),
+    "vencimientos": ReportDefinition(
+        headers=["Medicamento", "Fecha Vencimiento", "Lote", "Stock"],
+        query=_vencimientos_query,
+        version_column=Medicamento.updated_at,
+        format_row=lambda m: [
+            m.nombre_comercial,
+            m.fecha_vencimiento.strftime("%Y-%m-%d") if m.fecha_vencimiento else "N/A",
+            m.lote or "N/A",
+            m.stock_actual
+        ]
+    ),
+    "controlados": ReportDefinition(
+        headers=["Medicamento", "Stock", "Receta Requerida", "Lote"],
+        query=_controlados_query,
+        version_column=Medicamento.updated_at,
+        format_row=lambda m: [
+            m.nombre_comercial,
+            m.stock_actual,
+            "Sí" if m.requiere_receta else "No",
+            m.lote or "N/A"
+        ]
+    ),
+}
+
+def iter_report_rows(db: Session, reporte: ReportDefinition, farmacia_id: UUID) -> Iterator[list]:
+    """Formatted report rows, fetched in batches (server-side cursor on PostgreSQL)"""
+    for row in reporte.query(db, farmacia_id).yield_per(settings.REPORT_STREAM_BATCH_SIZE):
+        yield reporte.format_row(row)
+
+def write_csv(headers: List[str], rows: Iterable[list]) -> Iterator[bytes]:
+    """CSV chunks; the header goes out before the first row is fetched"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> bytes:
+        chunk = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    # BOM so Excel opens the accents correctly
+    buffer.write("\ufeff")
+    writer.writerow(headers)
+    yield flush()
+
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % settings.REPORT_STREAM_BATCH_SIZE == 0:
+            yield flush()
+    yield flush()
+
+def save_xlsx(archivo: BinaryIO, titulo: str, farmacia_id: UUID, headers: List[str], rows: Iterable[list]) -> None:
+    """xlsx built with openpyxl's write-only mode, so memory stays flat"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Reporte")
+    sheet.append(headers)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(archivo)
+
+@lru_cache(maxsize=None)
+def pdf_table_style():
+    """Shared by every table of a report, so it is only built once"""
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+# Rows per table: reportlab splits each table across pages (repeating
+# the header), and small tables keep that split cheap
+PDF_ROWS_PER_TABLE = 200
+# Table cell padding and body font (reportlab defaults)
+PDF_CELL_PADDING = 6
+PDF_FONT = ("Helvetica", 10)
+
+def save_pdf(archivo: BinaryIO, titulo: str, farmacia_id: UUID, headers: List[str], rows: Iterable[list]) -> None:
+    """PDF with the rows in tables of PDF_ROWS_PER_TABLE rows that repeat the header on every page"""
+    from xml.sax.saxutils import escape
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+
+    doc = SimpleDocTemplate(archivo, pagesize=letter)
+    styles = getSampleStyleSheet()
+    estilo_celda = ParagraphStyle(
+        "celda", parent=styles['Normal'], fontName=PDF_FONT[0], fontSize=PDF_FONT[1], alignment=TA_CENTER
+    )
+
+    elements = [
+        Paragraph(titulo, styles['Title']),
+        Spacer(1, 12),
+        Paragraph(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal']),
+        Paragraph(f"Farmacia ID: {farmacia_id}", styles['Normal']),
+        Spacer(1, 24)
+    ]
+
+    # Every table gets the same columns; the first one (name or date) gets
+    # double width. Text wider than its column is wrapped in a Paragraph so
+    # it breaks into lines instead of overflowing the cell; the rest stays
+    # a plain string, which is much cheaper to lay out.
+    unidad = doc.width / (len(headers) + 1)
+    col_widths = [unidad * 2] + [unidad] * (len(headers) - 1)
+    anchos_texto = [ancho - 2 * PDF_CELL_PADDING for ancho in col_widths]
+
+    def celda(valor, ancho_texto: float):
+        texto = "" if valor is None else str(valor)
+        if stringWidth(texto, *PDF_FONT) <= ancho_texto:
+            return texto
+        return Paragraph(escape(texto), estilo_celda)
+
+    filas = iter(rows)
+
+    def siguiente_bloque() -> List[list]:
+        return [
+            [celda(valor, ancho) for valor, ancho in zip(fila, anchos_texto)]
+            for fila in islice(filas, PDF_ROWS_PER_TABLE)
+        ]
+
+    # At least one table, so an empty report still shows the header
+    bloque = siguiente_bloque()
+    while True:
+        elements.append(Table([headers] + bloque, colWidths=col_widths, style=pdf_table_style(), repeatRows=1))
+        if len(bloque) < PDF_ROWS_PER_TABLE:
+            break
+        bloque = siguiente_bloque()
+        if not bloque:
+            break
+
+    doc.build(elements)
+
+def save_csv(archivo: BinaryIO, titulo: str, farmacia_id: UUID, headers: List[str], rows: Iterable[list]) -> None:
+    for chunk in write_csv(headers, rows):
+        archivo.write(chunk)
+
+# formato -> (renderer, file extension, media type)
+RENDERERS = {
+    "excel": (save_xlsx, "xlsx", XLSX_MEDIA_TYPE),
+    "pdf": (save_pdf, "pdf", PDF_MEDIA_TYPE),
+    "csv": (save_csv, "csv", CSV_MEDIA_TYPE),
+}
+
+def render_report_file(tipo: str, formato: str, farmacia_id: UUID, directorio: Optional[str] = None) -> str:
+    """Render a report into a new file in `directorio` (default: the
+    system temp dir) and return its path.
+
+    Runs in a report worker process (see report_pool).
+    """
+    reporte = REPORTES[tipo]
+    renderer, extension, _ = RENDERERS[formato]
+    fd, path = tempfile.mkstemp(prefix=f"reporte_{tipo}_", suffix=f".{extension}", dir=directorio)
+    db = SessionLocal()
+    try:
+        with os.fdopen(fd, "wb") as archivo:
+            renderer(
+                archivo,
+                f"Reporte de {tipo.capitalize()}",
+                farmacia_id,
+                reporte.headers,
+                iter_report_rows(db, reporte, farmacia_id)
+            )
+    except BaseException:
+        os.unlink(path)
+        raise
+    finally:
+        db.close()
+    return path
+
+def stream_report(
+    reporte: ReportDefinition,
+    farmacia_id: UUID,
+    writer: Callable[[List[str], Iterable[list]], Iterator[bytes]]
+) -> Iterator[bytes]:
+    """Body for a StreamingResponse.
+
+    Uses its own session: the request's session is closed before the
+    response body is sent.
+    """
+    db = SessionLocal()
+    try:
+        yield from writer(reporte.headers, iter_report_rows(db, reporte, farmacia_id))
+    finally:
+        db.close()
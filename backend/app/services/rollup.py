@@ -0,0 +1,129 @@
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from app.models.resumen import ResumenVentasDia, ResumenVentasMedicamento
+from app.models.venta import Venta, DetalleVenta
+
+def _upsert_add(db: Session, model, rows: List[dict], keys: List[str], sumas: List[str]) -> None:
+    """INSERT rows, adding the `sumas` columns to the existing row on key conflict"""
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(model).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={columna: getattr(model, columna) + getattr(stmt.excluded, columna) for columna in sumas}
+        )
+        db.execute(stmt)
+        return
+
+    for row in rows:
+        result = db.execute(
+            update(model)
+            .where(*(getattr(model, key) == row[key] for key in keys))
+            .values({columna: getattr(model, columna) + row[columna] for columna in sumas}),
+            execution_options={"synchronize_session": False}
+        )
+        if result.rowcount == 0:
+            db.execute(insert(model), [row])
+
+def record_sale(
+    db: Session,
+    farmacia_id: UUID,
+    fecha: date,
+    total: Decimal,
+    detalles: Iterable[dict]
+) -> None:
+    """Add a sale to the daily rollups, inside the sale's own transaction"""
+    _upsert_add(
+        db,
+        ResumenVentasDia,
+        [{"farmacia_id": farmacia_id, "fecha": fecha, "num_ventas": 1, "total": total}],
+        keys=["farmacia_id", "fecha"],
+        sumas=["num_ventas", "total"]
+    )
+
+    # One row per medication: a multi-row upsert cannot touch the same key twice
+    por_medicamento: Dict[UUID, Tuple[int, Decimal]] = {}
+    for detalle in detalles:
+        cantidad, subtotal = por_medicamento.get(detalle["medicamento_id"], (0, Decimal("0")))
+        por_medicamento[detalle["medicamento_id"]] = (cantidad + detalle["cantidad"], subtotal + detalle["subtotal"])
+
+    _upsert_add(
+        db,
+        ResumenVentasMedicamento,
+        [
+            {
+                "farmacia_id": farmacia_id,
+                "fecha": fecha,
+                "medicamento_id": medicamento_id,
+                "cantidad": cantidad,
+                "subtotal": subtotal
+            } for medicamento_id, (cantidad, subtotal) in por_medicamento.items()
+        ],
+        keys=["farmacia_id", "fecha", "medicamento_id"],
+        sumas=["cantidad", "subtotal"]
+    )
+
+def rebuild_rollups(
+    db: Session,
+    farmacia_id: Optional[UUID] = None,
+    desde: Optional[date] = None
+) -> None:
+    """Recompute the rollups from ventas/detalle_ventas (backfill or repair).
+
+    Optionally limited to one pharmacy and/or to days from `desde` on.
+    The caller commits.
+    """
+    def acotar(stmt, model):
+        if farmacia_id is not None:
+            stmt = stmt.where(model.farmacia_id == farmacia_id)
+        if desde is not None:
+            stmt = stmt.where(model.fecha >= desde)
+        return stmt
+
+    def acotar_ventas(stmt):
+        if farmacia_id is not None:
+            stmt = stmt.where(Venta.farmacia_id == farmacia_id)
+        if desde is not None:
+            stmt = stmt.where(Venta.fecha_venta >= desde)
+        return stmt
+
+    db.execute(acotar(delete(ResumenVentasDia), ResumenVentasDia))
+    db.execute(acotar(delete(ResumenVentasMedicamento), ResumenVentasMedicamento))
+
+    fecha = func.date(Venta.fecha_venta)
+    db.execute(
+        insert(ResumenVentasDia).from_select(
+            ["farmacia_id", "fecha", "num_ventas", "total"],
+            acotar_ventas(
+                select(Venta.farmacia_id, fecha, func.count(Venta.id), func.sum(Venta.total))
+                .group_by(Venta.farmacia_id, fecha)
+            )
+        )
+    )
+    db.execute(
+        insert(ResumenVentasMedicamento).from_select(
+            ["farmacia_id", "fecha", "medicamento_id", "cantidad", "subtotal"],
+            acotar_ventas(
+                select(
+                    Venta.farmacia_id,
+                    fecha,
+                    DetalleVenta.medicamento_id,
+                    func.sum(DetalleVenta.cantidad),
+                    func.sum(DetalleVenta.subtotal)
+                )
+                .join(Venta, Venta.id == DetalleVenta.venta_id)
+                .group_by(Venta.farmacia_id, fecha, DetalleVenta.medicamento_id)
+            )
+        )
+    )
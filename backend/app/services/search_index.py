@@ -0,0 +1,261 @@
+import heapq
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+from uuid import UUID
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.medicamento import Medicamento
+from app.services.pharmacy_index import PharmacyIndex
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase and strip accents: 'Acetaminofén' -> 'acetaminofen'"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+@dataclass(frozen=True)
+class _Entry:
+    id: UUID
+    nombre: str
+    generico: str
+    codigo: str
+    activo: bool
+    es_controlado: bool
+    nombre_tokens: tuple
+    generico_tokens: tuple
+
+    def grams(self) -> Set[str]:
+        """Trigrams of every field plus word prefixes ("^a", "^ac") for 1-2 char terms"""
+        grams = trigrams(self.nombre) | trigrams(self.generico) | trigrams(self.codigo)
+        for token in self.nombre_tokens + self.generico_tokens + (self.codigo,):
+            grams.add("^" + token[:1])
+            grams.add("^" + token[:2])
+        return grams
+
+    def matches(self, term: str) -> bool:
+        if len(term) < 3:
+            return self.codigo.startswith(term) or any(
+                token.startswith(term) for token in self.nombre_tokens + self.generico_tokens
+            )
+        return term in self.nombre or term in self.generico or term in self.codigo
+
+    def score(self, term: str) -> tuple:
+        """Lower is better: barcode, name prefix, word prefix, generic name, substring"""
+        if self.codigo == term:
+            rank = 0
+        elif self.codigo.startswith(term):
+            rank = 1
+        elif self.nombre.startswith(term):
+            rank = 2
+        elif any(token.startswith(term) for token in self.nombre_tokens):
+            rank = 3
+        elif any(token.startswith(term) for token in self.generico_tokens):
+            rank = 4
+        else:
+            rank = 5
+        return (rank, len(self.nombre), self.nombre)
+
+    @classmethod
+    def from_medicamento(cls, medicamento: Medicamento) -> "_Entry":
+        nombre = normalize(medicamento.nombre_comercial)
+        generico = normalize(medicamento.nombre_generico)
+        return cls(
+            id=medicamento.id,
+            nombre=nombre,
+            generico=generico,
+            codigo=normalize(medicamento.codigo_barras),
+            activo=bool(medicamento.activo),
+            es_controlado=bool(medicamento.es_controlado),
+            nombre_tokens=tuple(nombre.split()),
+            generico_tokens=tuple(generico.split())
+        )
+
+class _FarmaciaSearch:
+    """N-gram postings of one pharmacy's catalog"""
+
+    def __init__(self):
+        self.entries: Dict[UUID, _Entry] = {}
+        self.postings: Dict[str, Set[UUID]] = {}
+
+    def put(self, entry: _Entry) -> None:
+        self.remove(entry.id)
+        self.entries[entry.id] = entry
+        for gram in entry.grams():
+            self.postings.setdefault(gram, set()).add(entry.id)
+
+    def remove(self, medicamento_id: UUID) -> None:
+        entry = self.entries.pop(medicamento_id, None)
+        if entry is None:
+            return
+        for gram in entry.grams():
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(medicamento_id)
+                if not ids:
+                    del self.postings[gram]
+
+    def candidates(self, term: str) -> Set[UUID]:
+        keys = {"^" + term} if len(term) < 3 else trigrams(term)
+        postings = sorted((self.postings.get(key, set()) for key in keys), key=len)
+        if not postings[0]:
+            return set()
+        return postings[0].intersection(*postings[1:])
+
+class SearchIndex(PharmacyIndex[_FarmaciaSearch]):
+    """In-process n-gram/prefix index over medication names and barcodes.
+
+    Fallback search engine for databases without pg_trgm (the SQLite dev
+    database). Matching is accent and case insensitive: terms of 3+
+    characters match anywhere in the name, generic name or barcode, shorter
+    terms match word prefixes. Maintained like the barcode index (see
+    PharmacyIndex): built on a thread after the pharmacy's first search,
+    kept up to date by the medication endpoints and rebuilt every
+    `refresh_interval` seconds, searches using the previous snapshot
+    meanwhile.
+    """
+
+    def _build(self, db: Session, farmacia_id: UUID) -> _FarmaciaSearch:
+        rows = db.query(
+            Medicamento.id,
+            Medicamento.nombre_comercial,
+            Medicamento.nombre_generico,
+            Medicamento.codigo_barras,
+            Medicamento.activo,
+            Medicamento.es_controlado
+        ).filter(Medicamento.farmacia_id == farmacia_id).all()
+
+        indice = _FarmaciaSearch()
+        for row in rows:
+            indice.put(_Entry.from_medicamento(row))
+        return indice
+
+    def search(
+        self,
+        db: Session,
+        farmacia_id: UUID,
+        search: str,
+        activo: bool = True,
+        es_controlado: Optional[bool] = None,
+        limit: Optional[int] = None
+    ) -> Optional[List[UUID]]:
+        """Ids of the (first `limit`) matching medications, best match first.
+
+        None while the pharmacy's index is still being built.
+        """
+        term = normalize(search).strip()
+        if not term:
+            return []
+
+        indice = self._get_farmacia(db, farmacia_id)
+        if indice is None:
+            return None
+        entries = [
+            entry for entry in (indice.entries[i] for i in indice.candidates(term))
+            if entry.activo == activo
+            and (es_controlado is None or entry.es_controlado == es_controlado)
+            and entry.matches(term)
+        ]
+        if limit is None:
+            entries.sort(key=lambda entry: entry.score(term))
+        else:
+            entries = heapq.nsmallest(limit, entries, key=lambda entry: entry.score(term))
+        return [entry.id for entry in entries]
+
+    def put(self, medicamento: Medicamento) -> None:
+        """Add or refresh a medication after it was created or updated"""
+        entry = _Entry.from_medicamento(medicamento)
+        self._apply(medicamento.farmacia_id, lambda indice: indice.put(entry))
+
+search_index = SearchIndex(refresh_interval=settings.SEARCH_INDEX_REFRESH_SECONDS)
+
+def _use_trigram_search(db: Session) -> bool:
+    if settings.SEARCH_BACKEND == "auto":
+        return db.get_bind().dialect.name == "postgresql"
+    return settings.SEARCH_BACKEND == "postgres"
+
+def _search_like(
+    db: Session,
+    farmacia_id: UUID,
+    search: str,
+    activo: bool,
+    es_controlado: Optional[bool],
+    skip: int,
+    limit: int
+) -> List[Medicamento]:
+    """Unranked ILIKE search, while the pharmacy's SearchIndex is being built"""
+    pattern = f"%{escape_like(search.strip())}%"
+    query = db.query(Medicamento).filter(
+        Medicamento.farmacia_id == farmacia_id,
+        Medicamento.activo == activo,
+        or_(
+            Medicamento.nombre_comercial.ilike(pattern, escape="\\"),
+            Medicamento.nombre_generico.ilike(pattern, escape="\\"),
+            Medicamento.codigo_barras.ilike(pattern, escape="\\")
+        )
+    )
+    if es_controlado is not None:
+        query = query.filter(Medicamento.es_controlado == es_controlado)
+    return query.order_by(Medicamento.nombre_comercial).offset(skip).limit(limit).all()
+
+def search_medicamentos(
+    db: Session,
+    farmacia_id: UUID,
+    search: str,
+    activo: bool = True,
+    es_controlado: Optional[bool] = None,
+    skip: int = 0,
+    limit: int = 50
+) -> List[Medicamento]:
+    """Ranked, accent-insensitive medication search.
+
+    Uses the pg_trgm GIN indexes on PostgreSQL and the in-process
+    SearchIndex elsewhere (see SEARCH_BACKEND).
+    """
+    if _use_trigram_search(db):
+        term = normalize(search).strip()
+        pattern = f"%{escape_like(term)}%"
+        nombre = func.f_unaccent(func.lower(Medicamento.nombre_comercial))
+        generico = func.f_unaccent(func.lower(Medicamento.nombre_generico))
+        # Barcodes can be alphanumeric: match them case-insensitively
+        # (lower() on both sides, as in the trigram index) and rank an
+        # exact match of the barcode as typed first
+        codigo = func.lower(Medicamento.codigo_barras)
+
+        query = db.query(Medicamento).filter(
+            Medicamento.farmacia_id == farmacia_id,
+            Medicamento.activo == activo,
+            or_(
+                nombre.like(pattern, escape="\\"),
+                generico.like(pattern, escape="\\"),
+                codigo.like(pattern, escape="\\")
+            )
+        )
+        if es_controlado is not None:
+            query = query.filter(Medicamento.es_controlado == es_controlado)
+
+        return query.order_by(
+            (Medicamento.codigo_barras == search.strip()).desc(),
+            func.greatest(func.similarity(nombre, term), func.similarity(generico, term)).desc(),
+            Medicamento.nombre_comercial
+        ).offset(skip).limit(limit).all()
+
+    ids = search_index.search(db, farmacia_id, search, activo, es_controlado, limit=skip + limit)
+    if ids is None:
+        return _search_like(db, farmacia_id, search, activo, es_controlado, skip, limit)
+    ids = ids[skip:]
+    if not ids:
+        return []
+
+    # The ids come from this pharmacy's index; filtering on farmacia_id too
+    # would make SQLite scan the farmacia_id index instead of the primary key
+    medicamentos = {m.id: m for m in db.query(Medicamento).filter(Medicamento.id.in_(ids))}
+    return [medicamentos[i] for i in ids if i in medicamentos]
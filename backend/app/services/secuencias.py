@@ -0,0 +1,114 @@
+import asyncio
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import Integer, cast, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.secuencia import SecuenciaVenta
+from app.models.venta import Venta
+
+def format_numero_venta(fecha: date, numero: int) -> str:
+    """Build the printed sale number, e.g. 20260115-0042"""
+    return f"{fecha.strftime('%Y%m%d')}-{numero:04d}"
+
+def _increment(db: Session, farmacia_id: UUID, fecha: date, cantidad: int) -> Optional[int]:
+    """Atomically bump the counter row; returns the new value or None if the row is missing"""
+    result = db.execute(
+        update(SecuenciaVenta)
+        .where(
+            SecuenciaVenta.farmacia_id == farmacia_id,
+            SecuenciaVenta.fecha == fecha
+        )
+        .values(ultimo_numero=SecuenciaVenta.ultimo_numero + cantidad)
+        .returning(SecuenciaVenta.ultimo_numero),
+        execution_options={"synchronize_session": False}
+    )
+    return result.scalar()
+
+def _last_existing_number(db: Session, farmacia_id: UUID, fecha: date) -> int:
+    """Highest sale number already used that day (sales created before the counter existed)"""
+    prefijo = f"{fecha.strftime('%Y%m%d')}-"
+    # Compare the numbers, not the strings: "10000" sorts before "9999"
+    numero = cast(func.substr(Venta.numero_venta, len(prefijo) + 1), Integer)
+    ultimo = db.query(func.max(numero)).filter(
+        Venta.farmacia_id == farmacia_id,
+        Venta.numero_venta.like(f"{prefijo}%")
+    ).scalar()
+
+    return ultimo or 0
+
+def reserve_numbers(db: Session, farmacia_id: UUID, fecha: date, cantidad: int = 1) -> int:
+    """Reserve `cantidad` consecutive numbers and return the last one.
+
+    The counter row stays locked until `db` commits or rolls back, so when
+    called inside the sale transaction a rolled back sale gives its number
+    back and the day's sequence has no gaps.
+    """
+    ultimo = _increment(db, farmacia_id, fecha, cantidad)
+    if ultimo is not None:
+        return ultimo
+
+    # First sale of the day: create the counter row
+    inicial = _last_existing_number(db, farmacia_id, fecha)
+    try:
+        with db.begin_nested():
+            db.add(SecuenciaVenta(
+                farmacia_id=farmacia_id,
+                fecha=fecha,
+                ultimo_numero=inicial + cantidad
+            ))
+        return inicial + cantidad
+    except IntegrityError:
+        # Another till created it first
+        return _increment(db, farmacia_id, fecha, cantidad)
+
+class BlockSequenceAllocator:
+    """Hands out sale numbers from blocks reserved in advance.
+
+    A block is reserved in its own short transaction (an async session, so
+    the event loop keeps serving while it commits), so most sales get
+    their number without touching the database and never wait on the
+    counter row. Numbers are unique but unused ones are lost when a sale
+    fails or the worker restarts, so this mode is not gap-free.
+    """
+
+    def __init__(self, block_size: int, session_factory=AsyncSessionLocal):
+        self.block_size = block_size
+        self.session_factory = session_factory
+        self._blocks: Dict[Tuple[UUID, date], Tuple[int, int]] = {}
+        self._lock = asyncio.Lock()
+
+    async def next(self, farmacia_id: UUID, fecha: date) -> int:
+        key = (farmacia_id, fecha)
+        async with self._lock:
+            siguiente, fin = self._blocks.get(key, (1, 0))
+            if siguiente > fin:
+                fin = await self._reserve_block(farmacia_id, fecha)
+                siguiente = fin - self.block_size + 1
+                # Drop blocks from previous days
+                self._blocks = {k: v for k, v in self._blocks.items() if k[1] == fecha}
+            self._blocks[key] = (siguiente + 1, fin)
+            return siguiente
+
+    async def _reserve_block(self, farmacia_id: UUID, fecha: date) -> int:
+        async with self.session_factory() as db:
+            fin = await db.run_sync(reserve_numbers, farmacia_id, fecha, self.block_size)
+            await db.commit()
+            return fin
+
+block_allocator = BlockSequenceAllocator(settings.SALE_NUMBER_BLOCK_SIZE)
+
+async def next_numero_venta(db: AsyncSession, farmacia_id: UUID) -> str:
+    """Allocate the next sale number for the pharmacy according to SALE_NUMBER_MODE"""
+    fecha = datetime.now().date()
+
+    if settings.SALE_NUMBER_MODE == "block":
+        numero = await block_allocator.next(farmacia_id, fecha)
+    else:
+        numero = await db.run_sync(reserve_numbers, farmacia_id, fecha)
+
+    return format_numero_venta(fecha, numero)
@@ -0,0 +1,63 @@
+from typing import Dict, Iterable, List
+from uuid import UUID
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+from app.models.medicamento import Medicamento
+
+def aggregate_quantities(lines: Iterable) -> Dict[UUID, int]:
+    """Sum requested quantities per medication (a cart may repeat a product)"""
+    cantidades: Dict[UUID, int] = {}
+    for line in lines:
+        cantidades[line.medicamento_id] = cantidades.get(line.medicamento_id, 0) + line.cantidad
+    return cantidades
+
+def load_medicamentos_for_sale(
+    db: Session,
+    farmacia_id: UUID,
+    medicamento_ids: Iterable[UUID]
+) -> Dict[UUID, Medicamento]:
+    """Load and lock every medication of a sale in one query.
+
+    Rows are locked ordered by id so concurrent tills always acquire the
+    locks in the same order and cannot deadlock each other.
+    """
+    ids = sorted(set(medicamento_ids))
+    medicamentos = db.query(Medicamento).filter(
+        Medicamento.id.in_(ids),
+        Medicamento.farmacia_id == farmacia_id,
+        Medicamento.activo == True
+    ).order_by(Medicamento.id).with_for_update().all()
+
+    return {m.id: m for m in medicamentos}
+
+def decrement_stock(
+    db: Session,
+    farmacia_id: UUID,
+    cantidades: Dict[UUID, int]
+) -> Dict[UUID, int]:
+    """Apply all stock decrements of a sale with one conditional UPDATE.
+
+    Only rows with enough stock are updated. Returns the new stock of every
+    updated medication; see `insufficient_stock` for the lines that failed.
+    """
+    if not cantidades:
+        return {}
+
+    cantidad = case(cantidades, value=Medicamento.id)
+    result = db.execute(
+        update(Medicamento)
+        .where(
+            Medicamento.farmacia_id == farmacia_id,
+            Medicamento.id.in_(list(cantidades)),
+            Medicamento.stock_actual >= cantidad
+        )
+        .values(stock_actual=Medicamento.stock_actual - cantidad)
+        .returning(Medicamento.id, Medicamento.stock_actual),
+        execution_options={"synchronize_session": False}
+    )
+
+    return {medicamento_id: stock for medicamento_id, stock in result}
+
+def insufficient_stock(cantidades: Dict[UUID, int], nuevo_stock: Dict[UUID, int]) -> List[UUID]:
+    """Lines that `decrement_stock` could not apply; the caller must roll back if any"""
+    return [medicamento_id for medicamento_id in cantidades if medicamento_id not in nuevo_stock]
@@ -0,0 +1,73 @@
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from uuid import UUID
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.token_revocado import TokenRevocado
+
+# A revocation committed by another worker can carry a created_at a little
+# older than our last read (clock skew, slow commit): re-read this much
+REFRESH_OVERLAP = timedelta(minutes=1)
+
+class RevocationList:
+    """Revoked token ids (jti -> expiry), mirrored from `tokens_revocados`.
+
+    Requests check it in memory, with no query. The table is re-read at
+    most every `refresh_interval` seconds, and then only the rows created
+    since the previous read; entries are dropped once their token has
+    expired. Revocations made by this worker apply immediately.
+    """
+
+    def __init__(self, refresh_interval: float, clock: Callable[[], float] = time.monotonic):
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self.refreshes = 0
+        self._revocados: Dict[str, datetime] = {}
+        self._loaded_at: Optional[float] = None
+        self._leido_hasta: Optional[datetime] = None
+        self._refreshing = False
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Read the revocations created since the last refresh, if one is due"""
+        if self._loaded_at is not None and (
+            self._refreshing or self.clock() - self._loaded_at < self.refresh_interval
+        ):
+            return
+
+        self._refreshing = True
+        try:
+            ahora = datetime.utcnow()
+            query = select(TokenRevocado.jti, TokenRevocado.expira_en).where(TokenRevocado.expira_en > ahora)
+            if self._leido_hasta is not None:
+                query = query.where(TokenRevocado.created_at >= self._leido_hasta - REFRESH_OVERLAP)
+            filas = (await db.execute(query)).all()
+
+            revocados = {jti: expira_en for jti, expira_en in self._revocados.items() if expira_en > ahora}
+            revocados.update(filas)
+            self._revocados = revocados
+            self._leido_hasta = ahora
+            self._loaded_at = self.clock()
+            self.refreshes += 1
+        finally:
+            self._refreshing = False
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti is not None and jti in self._revocados
+
+    async def revoke(self, db: AsyncSession, jti: str, usuario_id: UUID, expira_en: datetime) -> None:
+        """Revoke a token for every worker, and right away in this one"""
+        await db.merge(TokenRevocado(jti=jti, usuario_id=usuario_id, expira_en=expira_en))
+        # Revocations of expired tokens are no longer needed
+        await db.execute(delete(TokenRevocado).where(TokenRevocado.expira_en <= datetime.utcnow()))
+        await db.commit()
+        self._revocados[jti] = expira_en
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._revocados),
+            "refreshes": self.refreshes
+        }
+
+revocation_list = RevocationList(refresh_interval=settings.TOKEN_REVOCATION_REFRESH_SECONDS)
@@ -0,0 +1,62 @@
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache
+from app.models.user import Usuario
+
+# A change committed by another worker can carry an updated_at a little
+# older than our last read (clock skew, slow commit): re-read this much
+REFRESH_OVERLAP = timedelta(minutes=1)
+
+class UserChangeFeed:
+    """Evicts users changed by any worker from this worker's user cache.
+
+    `invalidate_user` only reaches the worker that handled the write. At
+    most every `refresh_interval` seconds this reads the ids of the users
+    whose `updated_at` moved since the previous read and drops them from
+    `cache`, so a deactivation or role change handled by another worker
+    applies here within that time. Deleted rows leave no stamp to read:
+    those are bounded by the cache TTL instead.
+    """
+
+    def __init__(self, cache: TTLCache, refresh_interval: float, clock: Callable[[], float] = time.monotonic):
+        self.cache = cache
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self.refreshes = 0
+        self.evictions = 0
+        self._loaded_at: Optional[float] = None
+        self._leido_hasta: Optional[datetime] = None
+        self._refreshing = False
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Evict the users changed since the last refresh, if one is due"""
+        if self._loaded_at is not None and (
+            self._refreshing or self.clock() - self._loaded_at < self.refresh_interval
+        ):
+            return
+
+        self._refreshing = True
+        try:
+            ahora = datetime.utcnow()
+            if self._leido_hasta is None:
+                # Nothing read before this point can be cached yet
+                self.cache.clear()
+            else:
+                query = select(Usuario.id).where(Usuario.updated_at >= self._leido_hasta - REFRESH_OVERLAP)
+                for user_id in (await db.execute(query)).scalars():
+                    self.cache.invalidate(user_id)
+                    self.evictions += 1
+            self._leido_hasta = ahora
+            self._loaded_at = self.clock()
+            self.refreshes += 1
+        finally:
+            self._refreshing = False
+
+    def stats(self) -> dict:
+        return {
+            "refreshes": self.refreshes,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,55 @@
+"""
+Benchmark: barcode scan latency, DB query vs in-process barcode index.
+
+Adds an artificial delay to every statement to simulate a slow or remote
+database; the indexed lookup should stay sub-millisecond regardless.
+
+    python benchmarks/bench_barcode.py [database_url]
+"""
+import time
+import random
+from sqlalchemy import event
+
+from common import bench_database_url, create_bench_session, seed_catalog
+from app.models import Medicamento
+from app.services.barcode_index import BarcodeIndex
+
+CATALOG_SIZE = 5000
+SCANS = 2000
+DB_DELAY_SECONDS = 0.002
+
+def main():
+    Session = create_bench_session(bench_database_url())
+    db = Session()
+    farmacia_id, _ = seed_catalog(db, CATALOG_SIZE)
+
+    @event.listens_for(db.get_bind(), "before_cursor_execute")
+    def slow_db(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(DB_DELAY_SECONDS)
+
+    codigos = [f"BENCH{random.randrange(CATALOG_SIZE):08d}" for _ in range(SCANS)]
+
+    start = time.perf_counter()
+    for codigo in codigos:
+        db.query(Medicamento).filter(
+            Medicamento.farmacia_id == farmacia_id,
+            Medicamento.codigo_barras == codigo,
+            Medicamento.activo == True
+        ).first()
+    por_query = (time.perf_counter() - start) / SCANS
+
+    index = BarcodeIndex(refresh_interval=0)
+    index.lookup(db, farmacia_id, codigos[0])  # warm
+    start = time.perf_counter()
+    for codigo in codigos:
+        index.lookup(db, farmacia_id, codigo)
+    por_indice = (time.perf_counter() - start) / SCANS
+
+    print(f"catalog={CATALOG_SIZE} scans={SCANS} simulated db delay={DB_DELAY_SECONDS * 1000:.1f} ms")
+    print(f"db query:      {por_query * 1000:.3f} ms/scan")
+    print(f"barcode index: {por_indice * 1000:.4f} ms/scan")
+    print(f"index stats:   {index.stats(farmacia_id)}")
+    db.close()
+
+if __name__ == "__main__":
+    main()
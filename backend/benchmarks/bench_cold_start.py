@@ -0,0 +1,86 @@
+"""
+Benchmark and regression check: API worker cold start.
+
+Imports app.main in fresh interpreters (as each uvicorn worker does) and
+reports:
+  - wall time of the import (best of RUNS)
+  - peak RSS after the import
+  - the slowest modules according to `python -X importtime`
+
+Exits with status 1 if a report renderer library (openpyxl, reportlab)
+is imported by the API process, or if the import takes longer than the
+budget given on the command line.
+
+    python benchmarks/bench_cold_start.py [budget_ms]
+"""
+import os
+import re
+import sys
+import tempfile
+import subprocess
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+TOP_MODULES = 10
+# Must stay out of the API workers (see app.services.reportes)
+LAZY_MODULES = ["openpyxl", "reportlab"]
+
+PROBE = """
+import sys, time, resource
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+cargados = sorted({m.split('.')[0] for m in sys.modules} & set(sys.argv[1:]))
+print(f"{elapsed * 1000:.1f} {rss:.1f} {','.join(cargados)}")
+"""
+
+def child_env() -> dict:
+    # Never touch the configured database, even by accident
+    return {**os.environ, "DATABASE_URL": f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'cold.db')}"}
+
+def probe() -> tuple:
+    salida = subprocess.run(
+        [sys.executable, "-c", PROBE, *LAZY_MODULES],
+        cwd=BACKEND, env=child_env(), capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(salida[0]), float(salida[1]), salida[2].split(",") if len(salida) > 2 else []
+
+def importtime_top() -> list:
+    """[(cumulative ms, module)] of the slowest imports"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND, env=child_env(), capture_output=True, text=True, check=True
+    ).stderr
+    filas = []
+    for linea in stderr.splitlines():
+        m = re.match(r"import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)", linea)
+        # Top-level packages only, so nested imports are not counted twice
+        if m and len(m.group(2)) <= 3:
+            filas.append((int(m.group(1)) / 1000, m.group(3)))
+    return sorted(filas, reverse=True)[:TOP_MODULES]
+
+def main() -> int:
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else None
+    resultados = [probe() for _ in range(RUNS)]
+    import_ms = min(r[0] for r in resultados)
+    rss_mb = min(r[1] for r in resultados)
+    cargados = resultados[0][2]
+
+    print(f"import app.main: {import_ms:.0f} ms (best of {RUNS}), peak RSS {rss_mb:.1f} MB")
+    print("slowest imports (cumulative, -X importtime):")
+    for ms, modulo in importtime_top():
+        print(f"  {ms:>8.1f} ms  {modulo}")
+
+    ok = True
+    if cargados:
+        print(f"FAIL: report libraries imported at startup: {', '.join(cargados)}")
+        ok = False
+    if budget_ms is not None and import_ms > budget_ms:
+        print(f"FAIL: import took {import_ms:.0f} ms, budget {budget_ms:.0f} ms")
+        ok = False
+    print("OK" if ok else "")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Benchmark: expiry alerts (expired / 30 / 60 / 90 days), DB query vs the
+in-process expiry alert index.
+
+The query is what reading the buckets used to cost: a range scan over the
+pharmacy's active medications, bucketed in Python. The index serves the
+same buckets from its sorted list, with no query.
+
+    python benchmarks/bench_expiry_alerts.py [database_url]
+"""
+import time
+import random
+from datetime import date, timedelta
+
+from common import bench_database_url, create_bench_session, seed_catalog
+from app.models import Medicamento
+from app.services.expiry_alerts import BUCKET_NAMES, EXPIRY_BUCKET_DAYS, ExpiryAlertIndex
+
+CATALOG_SIZE = 20000
+READS = 500
+
+def query_buckets(db, farmacia_id) -> dict:
+    hoy = date.today()
+    medicamentos = db.query(
+        Medicamento.id, Medicamento.nombre_comercial, Medicamento.lote,
+        Medicamento.fecha_vencimiento, Medicamento.stock_actual
+    ).filter(
+        Medicamento.farmacia_id == farmacia_id,
+        Medicamento.activo == True,
+        Medicamento.fecha_vencimiento <= hoy + timedelta(days=EXPIRY_BUCKET_DAYS[-1])
+    ).order_by(Medicamento.fecha_vencimiento, Medicamento.id).all()
+
+    buckets = {nombre: [] for nombre in BUCKET_NAMES}
+    for medicamento in medicamentos:
+        dias = (medicamento.fecha_vencimiento - hoy).days
+        if dias < 0:
+            buckets["vencidos"].append(medicamento)
+        else:
+            limite = next(d for d in EXPIRY_BUCKET_DAYS if dias <= d)
+            buckets[f"hasta_{limite}_dias"].append(medicamento)
+    return buckets
+
+def main():
+    Session = create_bench_session(bench_database_url())
+    db = Session()
+    farmacia_id, ids = seed_catalog(db, CATALOG_SIZE)
+    # Expiry dates spread over the past month and the next three years
+    hoy = date.today()
+    db.bulk_update_mappings(Medicamento, [
+        {"id": medicamento_id, "fecha_vencimiento": hoy + timedelta(days=random.randrange(-30, 3 * 365))}
+        for medicamento_id in ids
+    ])
+    db.commit()
+
+    start = time.perf_counter()
+    for _ in range(READS):
+        esperado = query_buckets(db, farmacia_id)
+    por_query = (time.perf_counter() - start) / READS
+
+    index = ExpiryAlertIndex(refresh_interval=0)
+    start = time.perf_counter()
+    index.buckets(db, farmacia_id)
+    carga = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(READS):
+        buckets = index.buckets(db, farmacia_id)
+    por_indice = (time.perf_counter() - start) / READS
+
+    assert {n: len(v) for n, v in buckets.items()} == {n: len(v) for n, v in esperado.items()}
+    print(f"catalog={CATALOG_SIZE} reads={READS} alerts={index.stats()['size']}")
+    print(f"db query:     {por_query * 1000:.3f} ms/read")
+    print(f"index load:   {carga * 1000:.3f} ms (once per pharmacy and day)")
+    print(f"expiry index: {por_indice * 1000:.4f} ms/read")
+    print(f"buckets:      {dict((n, len(v)) for n, v in buckets.items())}")
+    db.close()
+
+if __name__ == "__main__":
+    main()
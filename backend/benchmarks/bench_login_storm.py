@@ -0,0 +1,139 @@
+"""
+Benchmark: login storm (shift change, every cashier logging in at once).
+
+Serves the app in-process with a single uvicorn worker and fires USERS
+concurrent POST /api/auth/login, while a probe requests GET / every
+PROBE_INTERVAL_MS. The probe's latency is how long the event loop stays
+blocked, i.e. how frozen the rest of the API (the POS) is during the storm.
+
+Two cases:
+  - inline:   password verified on the event loop (how login used to work)
+  - executor: verified on the password hashing threads (PASSWORD_HASH_WORKERS)
+
+    python benchmarks/bench_login_storm.py
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import tempfile
+import threading
+import statistics
+
+# Point the app at a throwaway database before it is imported
+if __name__ == "__main__":
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+import httpx
+import uvicorn
+
+from common import seed_catalog
+from app.main import app
+from app.api.routes import auth
+from app.core.config import settings
+from app.core.database import Base, SessionLocal, engine
+from app.core.security import get_password_hash, pwd_context, verify_and_update_password
+from app.models import Usuario, RolUsuario
+
+USERS = 40
+STORMS = 3
+PROBE_INTERVAL_MS = 10
+PASSWORD = "cajero123"
+
+def seed() -> list:
+    # The throwaway database matches the models, no migrations needed
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    farmacia_id, _ = seed_catalog(db, 0)
+    password_hash = get_password_hash(PASSWORD)
+    usernames = [f"cajero{i}" for i in range(USERS)]
+    db.add_all([
+        Usuario(
+            farmacia_id=farmacia_id,
+            username=username,
+            email=f"{username}@example.com",
+            password_hash=password_hash,
+            nombre_completo=username,
+            rol=RolUsuario.CAJERO
+        )
+        for username in usernames
+    ])
+    db.commit()
+    db.close()
+    return usernames
+
+def start_server() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+async def verify_inline(plain_password: str, hashed_password: str):
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def storm(base_url: str, usernames: list) -> tuple:
+    """(login latencies, probe latencies, seconds) of one storm"""
+    logins = []
+    probes = []
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await client.get("/")  # warm up the connection pool
+        terminado = asyncio.Event()
+
+        async def login(username):
+            start = time.perf_counter()
+            r = await client.post("/api/auth/login", json={"username": username, "password": PASSWORD})
+            r.raise_for_status()
+            logins.append(time.perf_counter() - start)
+
+        async def probe():
+            while not terminado.is_set():
+                start = time.perf_counter()
+                (await client.get("/")).raise_for_status()
+                probes.append(time.perf_counter() - start)
+                await asyncio.sleep(PROBE_INTERVAL_MS / 1000)
+
+        sonda = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login(username) for username in usernames))
+        total = time.perf_counter() - start
+        terminado.set()
+        await sonda
+
+    return logins, probes, total
+
+def percentile(valores: list, p: float) -> float:
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+def main():
+    usernames = seed()
+    base_url = start_server()
+
+    print(
+        f"1 worker, {USERS} concurrent logins x {STORMS} storms, "
+        f"pbkdf2_sha256 {settings.PASSWORD_HASH_ROUNDS} rounds, "
+        f"{settings.PASSWORD_HASH_WORKERS} hashing threads, {os.cpu_count()} CPUs"
+    )
+    print(f"{'case':<10} {'logins/s':>9} {'login p50':>10} {'login p95':>10} {'probe p50':>10} {'probe max':>10}  (ms)")
+    for nombre, verificar in [("inline", verify_inline), ("executor", verify_and_update_password)]:
+        auth.verify_and_update_password = verificar
+        logins, probes, segundos = [], [], 0.0
+        for _ in range(STORMS):
+            l, p, s = asyncio.run(storm(base_url, usernames))
+            logins += l
+            probes += p
+            segundos += s
+        print(
+            f"{nombre:<10} {len(logins) / segundos:>9.1f} "
+            f"{statistics.median(logins) * 1000:>10.1f} {percentile(logins, 0.95) * 1000:>10.1f} "
+            f"{statistics.median(probes) * 1000:>10.1f} {max(probes) * 1000:>10.1f}"
+        )
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Benchmark: per-statement cost of the request metrics / SQL diagnostics
+hooks.
+
+Runs the same ORM lookup by primary key (the cheapest statement the app
+issues, so the worst case in relative terms) on four engines:
+  - no hooks
+  - hooks, outside a request
+  - hooks, inside an unsampled request (statement count and time only)
+  - hooks, inside a sampled request (also counts statement templates)
+
+    python benchmarks/bench_query_diagnostics.py [DATABASE_URL]
+"""
+import time
+from collections import Counter
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from common import bench_database_url, create_bench_session, seed_catalog
+from app.core.request_metrics import RequestStats, current_request, install_query_hooks
+from app.models import Medicamento
+
+N_MEDICAMENTOS = 500
+ROUNDS = 15
+
+def lookups(session_factory, ids, templates=None, in_request: bool = False) -> float:
+    """Seconds per statement for one pass over `ids`"""
+    token = current_request.set(RequestStats(templates=templates)) if in_request else None
+    db = session_factory()
+    try:
+        start = time.perf_counter()
+        for medicamento_id in ids:
+            db.query(Medicamento).filter(Medicamento.id == medicamento_id).first()
+        return (time.perf_counter() - start) / len(ids)
+    finally:
+        db.close()
+        if token is not None:
+            current_request.reset(token)
+
+def main():
+    url = bench_database_url()
+    SessionLocal = create_bench_session(url)
+    db = SessionLocal()
+    _, ids = seed_catalog(db, N_MEDICAMENTOS)
+    db.close()
+
+    plain = sessionmaker(bind=create_engine(url))
+    hooked_engine = create_engine(url)
+    install_query_hooks(hooked_engine, slow_query_ms=500)
+    hooked = sessionmaker(bind=hooked_engine)
+
+    casos = [
+        ("no hooks", lambda: lookups(plain, ids)),
+        ("hooks, no request", lambda: lookups(hooked, ids)),
+        ("request, not sampled", lambda: lookups(hooked, ids, in_request=True)),
+        ("request, sampled", lambda: lookups(hooked, ids, templates=Counter(), in_request=True)),
+    ]
+    # Interleave the cases and keep each one's best pass, so machine noise
+    # hits them all alike
+    mejor = {nombre: float("inf") for nombre, _ in casos}
+    for _ in range(ROUNDS):
+        for nombre, caso in casos:
+            mejor[nombre] = min(mejor[nombre], caso())
+
+    base = mejor["no hooks"]
+    print(f"{'case':<28} {'us/statement':>13} {'overhead':>9}")
+    for nombre, segundos in mejor.items():
+        print(f"{nombre:<28} {segundos * 1e6:>13.1f} {(segundos / base - 1) * 100:>8.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: inventory report export, materialized vs streamed.
+
+For growing catalogs, measures time to first byte, total time and peak
+Python memory (tracemalloc) of:
+  - materialized: every ORM row loaded, then a regular openpyxl workbook
+    saved into memory (what descargar_reporte used to do)
+  - streamed CSV (write_csv over yield_per)
+  - write-only xlsx (save_xlsx over yield_per, as the report workers do)
+
+Streamed CSV time to first byte and peak memory should stay flat; the
+write-only xlsx peak memory too.
+
+    python benchmarks/bench_report_export.py [database_url]
+"""
+import time
+import tempfile
+import tracemalloc
+from io import BytesIO
+from openpyxl import Workbook
+
+from common import bench_database_url, create_bench_session, seed_catalog
+from app.models import Medicamento
+from app.services.reportes import REPORTES, iter_report_rows, save_xlsx, write_csv
+
+SIZES = [1_000, 10_000, 50_000]
+
+def materialized(db, farmacia_id):
+    reporte = REPORTES["inventario"]
+    meds = db.query(Medicamento).filter(
+        Medicamento.farmacia_id == farmacia_id,
+        Medicamento.activo == True
+    ).all()
+    data = [[m.nombre_comercial, m.stock_actual, m.stock_minimo, f"${float(m.precio_venta):.2f}", m.lote or "N/A"] for m in meds]
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(reporte.headers)
+    for row in data:
+        sheet.append(row)
+    output = BytesIO()
+    workbook.save(output)
+    yield output.getvalue()
+
+def streamed_csv(db, farmacia_id):
+    reporte = REPORTES["inventario"]
+    return write_csv(reporte.headers, iter_report_rows(db, reporte, farmacia_id))
+
+def write_only_xlsx(db, farmacia_id):
+    reporte = REPORTES["inventario"]
+    with tempfile.TemporaryFile() as archivo:
+        save_xlsx(archivo, "Inventario", farmacia_id, reporte.headers, iter_report_rows(db, reporte, farmacia_id))
+        archivo.seek(0)
+        yield archivo.read()
+
+def measure(db, farmacia_id, export):
+    db.expunge_all()
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    for chunk in export(db, farmacia_id):
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_byte, total, peak, size
+
+def main():
+    Session = create_bench_session(bench_database_url())
+    db = Session()
+
+    modos = [
+        ("materialized xlsx", materialized),
+        ("streamed csv", streamed_csv),
+        ("write-only xlsx", write_only_xlsx),
+    ]
+
+    print(f"{'rows':>7}  {'mode':<18} {'ttfb ms':>9} {'total ms':>9} {'peak MB':>8} {'bytes':>10}")
+    for n in SIZES:
+        farmacia_id, _ = seed_catalog(db, n)
+        for nombre, export in modos:
+            ttfb, total, peak, size = measure(db, farmacia_id, export)
+            print(f"{n:>7}  {nombre:<18} {ttfb * 1000:>9.1f} {total * 1000:>9.1f} {peak / 2**20:>8.1f} {size:>10}")
+
+    db.close()
+
+if __name__ == "__main__":
+    main()
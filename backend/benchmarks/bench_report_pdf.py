@@ -0,0 +1,65 @@
+"""
+Benchmark: PDF report rendering, one big table vs chunked tables.
+
+Renders synthetic inventory rows with save_pdf (tables of
+PDF_ROWS_PER_TABLE rows) and with the previous layout (a single Table
+holding every row), each case in a fresh process so peak RSS is
+comparable. The single
+table layout is quadratic (reportlab re-splits the remaining table on
+every page), so it is only run up to LEGACY_MAX_ROWS.
+
+    python benchmarks/bench_report_pdf.py
+"""
+import io
+import re
+import time
+import resource
+import multiprocessing
+
+import common  # noqa: F401  (puts the backend on sys.path)
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Table
+from app.services.reportes import REPORTES, pdf_table_style, save_pdf
+
+SIZES = [1_000, 10_000, 50_000]
+LEGACY_MAX_ROWS = 10_000
+
+def filas(n: int):
+    for i in range(n):
+        yield [f"Medicamento {i}", i % 500, 10, f"${(i % 97) + 0.5:.2f}", f"L{i % 1000:04d}"]
+
+def single_table(archivo, headers, n):
+    doc = SimpleDocTemplate(archivo, pagesize=letter)
+    tabla = Table([headers] + list(filas(n)))
+    tabla.setStyle(pdf_table_style())
+    doc.build([tabla])
+
+def chunked(archivo, headers, n):
+    save_pdf(archivo, "Reporte de Inventario", "bench", headers, filas(n))
+
+def run_case(modo: str, n: int) -> tuple:
+    """Runs in a child process: (seconds, peak RSS MB, baseline RSS MB, pages)"""
+    headers = REPORTES["inventario"].headers
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    archivo = io.BytesIO()
+    start = time.perf_counter()
+    (chunked if modo == "chunked" else single_table)(archivo, headers, n)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    paginas = len(re.findall(rb"/Type /Page\b(?!s)", archivo.getvalue()))
+    return elapsed, peak, base, paginas
+
+def main():
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'rows':>7}  {'layout':<13} {'seconds':>8} {'peak RSS MB':>12} {'(baseline)':>11} {'pages':>6}")
+    for n in SIZES:
+        for modo in ["single table", "chunked"]:
+            if modo == "single table" and n > LEGACY_MAX_ROWS:
+                print(f"{n:>7}  {modo:<13} {'skipped':>8}")
+                continue
+            with ctx.Pool(1) as pool:
+                elapsed, peak, base, paginas = pool.apply(run_case, (modo, n))
+            print(f"{n:>7}  {modo:<13} {elapsed:>8.2f} {peak:>12.1f} {base:>11.1f} {paginas:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: event loop stalls while a large PDF report is rendered.
+
+A ticker coroutine stands in for POS requests sharing the worker's event
+loop and records how late each 10 ms tick fires. Compares rendering the
+report inline in the loop (as descargar_reporte used to) with sending it
+to the report process pool.
+
+    python benchmarks/bench_report_pool.py [database_url]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+# The report workers open their own sessions from settings.DATABASE_URL and
+# inherit it from this process (they re-import this module as __mp_main__)
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        os.environ["DATABASE_URL"] = sys.argv[1]
+    else:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+from common import create_bench_session, seed_catalog
+from app.services.reportes import render_report_file
+from app.services.report_pool import ReportPool
+
+CATALOG_SIZE = 5000
+TICK_SECONDS = 0.01
+
+async def max_stall(render) -> tuple:
+    """Run render() while ticking; return (max tick delay, render time)"""
+    retrasos = []
+    terminado = asyncio.Event()
+
+    async def ticker():
+        while not terminado.is_set():
+            esperado = time.perf_counter() + TICK_SECONDS
+            await asyncio.sleep(TICK_SECONDS)
+            retrasos.append(time.perf_counter() - esperado)
+
+    tarea = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    path = await render()
+    duracion = time.perf_counter() - start
+    terminado.set()
+    await tarea
+    os.unlink(path)
+    return max(retrasos, default=duracion), duracion
+
+async def main():
+    Session = create_bench_session(os.environ["DATABASE_URL"])
+    db = Session()
+    farmacia_id, _ = seed_catalog(db, CATALOG_SIZE)
+    db.close()
+
+    async def inline():
+        return render_report_file("inventario", "pdf", farmacia_id)
+
+    pool = ReportPool(workers=2, max_per_farmacia=1, max_queue=20)
+    # Warm up the worker processes so their start-up cost is not measured
+    os.unlink(await pool.render("inventario", "excel", farmacia_id))
+
+    async def pooled():
+        return await pool.render("inventario", "pdf", farmacia_id)
+
+    for nombre, render in [("inline", inline), ("process pool", pooled)]:
+        stall, duracion = await max_stall(render)
+        print(f"{nombre:<13} render {duracion * 1000:8.1f} ms   max event loop stall {stall * 1000:8.1f} ms")
+
+    print(pool.stats())
+    pool.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""
+Benchmark: medication search on a 50k-item catalog.
+
+Compares the legacy three-way ILIKE '%term%' query with search_medicamentos
+(in-process n-gram index on SQLite, pg_trgm GIN indexes on PostgreSQL).
+
+    python benchmarks/bench_search.py [database_url]
+"""
+import time
+import random
+from sqlalchemy import or_
+
+from common import bench_database_url, create_bench_session, seed_catalog
+from app.models import Medicamento
+from app.services.search_index import search_index, search_medicamentos
+
+CATALOG_SIZE = 50_000
+ROUNDS = 20
+TERMS = ["acetaminofen", "ibupro", "amoxi", "lorata", "jarabe", "500", "om", "xyz"]
+
+PALABRAS = [
+    "Acetaminofén", "Ibuprofeno", "Amoxicilina", "Loratadina", "Omeprazol",
+    "Metformina", "Losartán", "Diclofenaco", "Cetirizina", "Ranitidina"
+]
+PRESENTACIONES = ["500mg", "400mg", "250mg", "Jarabe", "Suspensión", "Tabletas", "Cápsulas"]
+
+def nombre(i: int) -> str:
+    rnd = random.Random(i)
+    return f"{rnd.choice(PALABRAS)} {rnd.choice(PRESENTACIONES)} {rnd.choice(['MK', 'Bayer', 'Genfar', 'Lab'])} {i}"
+
+def legacy(db, farmacia_id, term):
+    return db.query(Medicamento).filter(
+        Medicamento.farmacia_id == farmacia_id,
+        Medicamento.activo == True,
+        or_(
+            Medicamento.nombre_comercial.ilike(f"%{term}%"),
+            Medicamento.nombre_generico.ilike(f"%{term}%"),
+            Medicamento.codigo_barras.ilike(f"%{term}%")
+        )
+    ).limit(50).all()
+
+def measure(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+def main():
+    Session = create_bench_session(bench_database_url())
+    db = Session()
+    farmacia_id, _ = seed_catalog(db, CATALOG_SIZE, nombre=nombre)
+
+    start = time.perf_counter()
+    search_medicamentos(db, farmacia_id, "warmup")
+    print(f"catalog={CATALOG_SIZE} index build (first search): {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print(f"{'term':>14} {'legacy ms':>10} {'hits':>6} {'search ms':>10} {'hits':>6}")
+    for term in TERMS:
+        before = measure(lambda: legacy(db, farmacia_id, term))
+        after = measure(lambda: search_medicamentos(db, farmacia_id, term))
+        print(f"{term:>14} {before:>10.2f} {len(legacy(db, farmacia_id, term)):>6} "
+              f"{after:>10.2f} {len(search_medicamentos(db, farmacia_id, term)):>6}")
+
+    search_index.invalidate()
+    db.close()
+
+if __name__ == "__main__":
+    main()
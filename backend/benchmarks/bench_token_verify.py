@@ -0,0 +1,49 @@
+"""
+Benchmark: per-request cost of authenticating the bearer token.
+
+Compares, for one token:
+  - decode_access_token:  HMAC signature check and claims parsing
+  - verify_access_token:  the same, served from the verified-token cache
+  - plus the in-memory revocation check done on every request
+
+    python benchmarks/bench_token_verify.py
+"""
+import time
+import uuid
+
+import common  # noqa: F401  (puts the backend on sys.path)
+from app.core.security import create_access_token, decode_access_token, verify_access_token, verified_tokens
+from app.services.token_revocation import revocation_list
+
+N = 20000
+ROUNDS = 5
+
+def per_call(funcion, *args) -> float:
+    """Best microseconds per call over ROUNDS passes of N calls"""
+    mejor = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(N):
+            funcion(*args)
+        mejor = min(mejor, (time.perf_counter() - start) / N)
+    return mejor * 1e6
+
+def main():
+    token = create_access_token(data={"sub": str(uuid.uuid4()), "farmacia_id": str(uuid.uuid4())})
+
+    def cached_and_checked(token):
+        payload = verify_access_token(token)
+        revocation_list.is_revoked(payload.get("jti"))
+
+    verified_tokens.clear()
+    verify_access_token(token)
+
+    print(f"{'case':<34} {'us/request':>11}")
+    decode_us = per_call(decode_access_token, token)
+    print(f"{'decode (signature + claims)':<34} {decode_us:>11.2f}")
+    cached_us = per_call(cached_and_checked, token)
+    print(f"{'cached + revocation check':<34} {cached_us:>11.2f}")
+    print(f"speedup: {decode_us / cached_us:.0f}x")
+
+if __name__ == "__main__":
+    main()
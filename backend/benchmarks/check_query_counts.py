@@ -0,0 +1,120 @@
+"""
+Regression check: sale listings must run a constant number of SQL statements.
+
+Calls get_ventas and get_cliente_historial with growing page sizes,
+serializes the result as the API does (List[VentaResponse]) and counts the
+statements executed. Exits with status 1 if the count grows with the page
+size (an N+1 on Venta.detalles).
+
+    python benchmarks/check_query_counts.py [database_url]
+"""
+import sys
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from common import bench_database_url, create_bench_session, seed_catalog
+from app.core.database import async_database_url
+from app.api.dependencies import UserPrincipal
+from app.api.routes.pos import get_ventas
+from app.api.routes.clientes import get_cliente_historial
+from app.models import Usuario, RolUsuario, Cliente, Venta, DetalleVenta, MetodoPago
+from app.schemas.venta import VentaResponse
+
+PAGE_SIZES = [1, 10, 50]
+DETALLES_POR_VENTA = 3
+
+def seed_ventas(db, farmacia_id, medicamento_ids, n_ventas: int):
+    usuario = Usuario(
+        farmacia_id=farmacia_id,
+        username=f"bench-{uuid.uuid4().hex[:8]}",
+        email=f"{uuid.uuid4().hex[:8]}@bench.local",
+        password_hash="x",
+        nombre_completo="Bench",
+        rol=RolUsuario.CAJERO
+    )
+    cliente = Cliente(farmacia_id=farmacia_id, nombre="Cliente Bench")
+    db.add_all([usuario, cliente])
+    db.flush()
+
+    inicio = datetime.utcnow()
+    for i in range(n_ventas):
+        venta = Venta(
+            farmacia_id=farmacia_id,
+            usuario_id=usuario.id,
+            cliente_id=cliente.id,
+            numero_venta=f"BENCH-{i:06d}",
+            subtotal=Decimal("6.00"),
+            total=Decimal("6.00"),
+            metodo_pago=MetodoPago.EFECTIVO,
+            fecha_venta=inicio - timedelta(minutes=i)
+        )
+        venta.detalles = [
+            DetalleVenta(
+                medicamento_id=medicamento_ids[j],
+                cantidad=1,
+                precio_unitario=Decimal("2.00"),
+                subtotal=Decimal("2.00")
+            ) for j in range(DETALLES_POR_VENTA)
+        ]
+        db.add(venta)
+    db.commit()
+    return UserPrincipal(id=usuario.id, farmacia_id=farmacia_id, rol=usuario.rol, activo=True), cliente.id
+
+def count_statements(engine, fn) -> int:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+def main() -> int:
+    url = bench_database_url()
+    Session = create_bench_session(url)
+    db = Session()
+    async_engine = create_async_engine(async_database_url(url))
+    AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+    farmacia_id, medicamento_ids = seed_catalog(db, DETALLES_POR_VENTA)
+    principal, cliente_id = seed_ventas(db, farmacia_id, medicamento_ids, max(PAGE_SIZES))
+    ventas_adapter = TypeAdapter(List[VentaResponse])
+
+    async def listar_ventas_async(limit):
+        async with AsyncSession() as adb:
+            ventas = await get_ventas(Response(), limit=limit, current_user=principal, db=adb)
+            ventas_adapter.validate_python(ventas, from_attributes=True)
+
+    def listar_ventas(limit):
+        asyncio.run(listar_ventas_async(limit))
+
+    def historial():
+        db.expire_all()
+        ventas = asyncio.run(get_cliente_historial(cliente_id, current_user=principal, db=db))
+        ventas_adapter.validate_python(ventas, from_attributes=True)
+
+    ok = True
+    counts = {limit: count_statements(async_engine.sync_engine, lambda: listar_ventas(limit)) for limit in PAGE_SIZES}
+    print(f"get_ventas statements by page size: {counts}")
+    ok &= len(set(counts.values())) == 1
+
+    historial_count = count_statements(db.get_bind(), historial)
+    print(f"get_cliente_historial statements for {max(PAGE_SIZES)} sales: {historial_count}")
+    ok &= historial_count <= 2
+
+    db.close()
+    print("OK" if ok else "FAIL: statement count depends on the number of sales")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
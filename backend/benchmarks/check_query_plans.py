@@ -0,0 +1,167 @@
+"""
+Regression check: the hot tenant-scoped queries must be served by an index.
+
+Builds each query the way the app does, captures the SQL and parameters
+the driver receives, runs EXPLAIN on them and checks that the plan uses
+the expected index. Exits with status 1 if any query does not.
+
+On SQLite the plan comes from EXPLAIN QUERY PLAN on a seeded database. On
+PostgreSQL sequential scans are disabled for the check (a small test
+database would rightly prefer them), so it verifies that the index is
+usable for the query, not that the planner picks it on production data.
+
+    python benchmarks/check_query_plans.py [database_url]
+"""
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import event, select, update
+
+from common import bench_database_url, create_bench_session, seed_catalog
+from check_query_counts import seed_ventas
+from app.core.pagination import _keyset_page, encode_cursor
+from app.models import Caja, Cliente, DetalleVenta, Medicamento, Proveedor, Venta
+from app.models.caja import EstadoCaja
+from app.services.reportes import REPORTES
+
+N_MEDICAMENTOS = 2000
+N_VENTAS = 500
+PAGE = 50
+
+class _Captured(Exception):
+    pass
+
+def driver_statement(db, stmt) -> tuple:
+    """(SQL, parameters) exactly as the DBAPI cursor would receive them"""
+    engine = db.get_bind()
+    captured = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured["sql"] = (statement, parameters)
+        raise _Captured()
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        db.execute(stmt)
+    except Exception:
+        if "sql" not in captured:
+            raise
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+        db.rollback()
+    return captured["sql"]
+
+def explain(db, stmt) -> str:
+    sql, parameters = driver_statement(db, stmt)
+    conn = db.connection()
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, parameters).all()
+        plan = "\n".join(row[-1] for row in rows)
+    else:
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        rows = conn.exec_driver_sql("EXPLAIN " + sql, parameters).all()
+        plan = "\n".join(row[0] for row in rows)
+    db.rollback()
+    return plan
+
+def seed(db):
+    farmacia_id, medicamento_ids = seed_catalog(db, N_MEDICAMENTOS)
+    # A few inactive and low stock medications, with expiry dates spread
+    # over the next year
+    db.execute(update(Medicamento).where(Medicamento.id.in_(medicamento_ids[::10])).values(activo=False))
+    db.execute(update(Medicamento).where(Medicamento.id.in_(medicamento_ids[1::50])).values(stock_actual=1))
+    for i, medicamento_id in enumerate(medicamento_ids[:365]):
+        db.execute(
+            update(Medicamento).where(Medicamento.id == medicamento_id)
+            .values(fecha_vencimiento=datetime.now().date() + timedelta(days=i))
+        )
+    principal, _ = seed_ventas(db, farmacia_id, medicamento_ids, N_VENTAS)
+    db.add_all([Cliente(farmacia_id=farmacia_id, nombre=f"Cliente {i}") for i in range(200)])
+    db.add_all([Proveedor(farmacia_id=farmacia_id, nombre=f"Proveedor {i}") for i in range(50)])
+    # One open till among the user's closed ones
+    db.add_all([
+        Caja(farmacia_id=farmacia_id, usuario_id=principal.id, monto_inicial=0, estado=EstadoCaja.CERRADA)
+        for _ in range(300)
+    ])
+    db.add(Caja(farmacia_id=farmacia_id, usuario_id=principal.id, monto_inicial=0))
+    db.commit()
+    db.connection().exec_driver_sql("ANALYZE")
+    db.commit()
+    return farmacia_id, principal.id
+
+def hot_queries(db, farmacia_id, usuario_id) -> list:
+    """(name, statement, index expected in the plan)"""
+    medicamento = db.query(Medicamento).filter(Medicamento.farmacia_id == farmacia_id, Medicamento.activo == True).first()
+    venta = db.query(Venta).filter(Venta.farmacia_id == farmacia_id).first()
+    venta_ids = [v.id for v in db.query(Venta.id).filter(Venta.farmacia_id == farmacia_id).limit(PAGE)]
+    db.rollback()
+
+    activos = select(Medicamento).where(Medicamento.farmacia_id == farmacia_id, Medicamento.activo == True)
+    ventas = select(Venta).where(Venta.farmacia_id == farmacia_id)
+    nombre_cursor = encode_cursor([medicamento.nombre_comercial, medicamento.id])
+    venta_cursor = encode_cursor([venta.fecha_venta, venta.id])
+
+    return [
+        ("barcode lookup",
+         select(Medicamento).where(
+             Medicamento.farmacia_id == farmacia_id,
+             Medicamento.codigo_barras == medicamento.codigo_barras,
+             Medicamento.activo == True
+         ),
+         "uq_medicamentos_farmacia_codigo_barras"),
+        ("medicamentos, first page",
+         _keyset_page(activos, [Medicamento.nombre_comercial, Medicamento.id], PAGE, None, False, 0),
+         "ix_medicamentos_activos_nombre"),
+        ("medicamentos, next page",
+         _keyset_page(activos, [Medicamento.nombre_comercial, Medicamento.id], PAGE, nombre_cursor, False, 0),
+         "ix_medicamentos_activos_nombre"),
+        ("stock alerts",
+         select(Medicamento).where(
+             Medicamento.farmacia_id == farmacia_id,
+             Medicamento.activo == True,
+             Medicamento.stock_actual <= Medicamento.stock_minimo
+         ).order_by(Medicamento.stock_actual.asc()).limit(5),
+         "ix_medicamentos_stock_bajo"),
+        ("ventas, first page",
+         _keyset_page(ventas, [Venta.fecha_venta, Venta.id], PAGE, None, True, 0),
+         "ix_ventas_farmacia_fecha"),
+        ("ventas, next page",
+         _keyset_page(ventas, [Venta.fecha_venta, Venta.id], PAGE, venta_cursor, True, 0),
+         "ix_ventas_farmacia_fecha"),
+        ("venta detalles (selectinload)",
+         select(DetalleVenta).where(DetalleVenta.venta_id.in_(venta_ids)),
+         "ix_detalle_ventas_venta_id"),
+        ("clientes, first page",
+         _keyset_page(select(Cliente).where(Cliente.farmacia_id == farmacia_id), [Cliente.nombre, Cliente.id], PAGE, None, False, 0),
+         "ix_clientes_farmacia_nombre"),
+        ("proveedores, first page",
+         _keyset_page(select(Proveedor).where(Proveedor.farmacia_id == farmacia_id), [Proveedor.nombre, Proveedor.id], PAGE, None, False, 0),
+         "ix_proveedores_farmacia_nombre"),
+        ("open till",
+         select(Caja).where(Caja.farmacia_id == farmacia_id, Caja.usuario_id == usuario_id, Caja.estado == EstadoCaja.ABIERTA),
+         "ix_cajas_farmacia_usuario_estado"),
+        ("report ventas", REPORTES["ventas"].query(db, farmacia_id).statement, "ix_ventas_farmacia_fecha"),
+        ("report inventario", REPORTES["inventario"].query(db, farmacia_id).statement, "ix_medicamentos_activos_nombre"),
+        ("report vencimientos", REPORTES["vencimientos"].query(db, farmacia_id).statement, "ix_medicamentos_activos_vencimiento"),
+        ("report controlados", REPORTES["controlados"].query(db, farmacia_id).statement, "ix_medicamentos_activos_nombre"),
+    ]
+
+def main() -> int:
+    Session = create_bench_session(bench_database_url())
+    db = Session()
+    farmacia_id, usuario_id = seed(db)
+
+    fallos = 0
+    for nombre, stmt, indice in hot_queries(db, farmacia_id, usuario_id):
+        plan = explain(db, stmt)
+        ok = indice in plan
+        fallos += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {nombre:<32} {indice}")
+        if not ok:
+            print("     " + plan.replace("\n", "\n     "))
+
+    db.close()
+    print("OK" if not fallos else f"FAIL: {fallos} queries do not use their index")
+    return 1 if fallos else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite database unless a database URL is
+given on the command line.
+"""
+import sys
+import os
+import uuid
+import tempfile
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models import Farmacia, Medicamento
+
+def bench_database_url() -> str:
+    """Database URL from argv, or a fresh SQLite file"""
+    if len(sys.argv) > 1:
+        return sys.argv[1]
+    return f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+def create_bench_session(url: str):
+    """Create the schema and return a session factory bound to it"""
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def seed_catalog(db, n_medicamentos: int, stock: int = 10_000_000, nombre=None):
+    """Create a pharmacy with n medications and return (farmacia_id, medicamento_ids)"""
+    farmacia = Farmacia(nombre="Bench", nit=f"BENCH-{uuid.uuid4().hex[:8]}")
+    db.add(farmacia)
+    db.flush()
+    medicamentos = []
+    for i in range(n_medicamentos):
+        medicamentos.append({
+            "id": uuid.uuid4(),
+            "farmacia_id": farmacia.id,
+            "codigo_barras": f"BENCH{i:08d}",
+            "nombre_comercial": nombre(i) if nombre else f"Medicamento {i}",
+            "precio_compra": Decimal("1.00"),
+            "precio_venta": Decimal("2.00"),
+            "stock_actual": stock,
+            "stock_minimo": 10,
+            "activo": True
+        })
+    db.bulk_insert_mappings(Medicamento, medicamentos)
+    db.commit()
+    return farmacia.id, [m["id"] for m in medicamentos]
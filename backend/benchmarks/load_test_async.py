@@ -0,0 +1,125 @@
+"""
+Load test: requests per second of one uvicorn worker, sync Session route vs
+AsyncSession route.
+
+Serves the app in-process with a single uvicorn worker and fires
+CONCURRENCY parallel clients at:
+  - GET /api/clientes      (still on the blocking Session)
+  - GET /api/medicamentos  (AsyncSession)
+
+Each SQL statement is given DB_LATENCY_MS of latency to stand in for the
+network round trip to PostgreSQL. The sleep happens in the thread running
+the statement: the event loop itself for the blocking driver, the
+aiosqlite thread for the async one - exactly where a real round trip
+would wait.
+
+    python benchmarks/load_test_async.py
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import tempfile
+import threading
+import statistics
+
+# Point the app at a throwaway database before it is imported
+if __name__ == "__main__":
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+import httpx
+import uvicorn
+from sqlalchemy import event
+
+from common import seed_catalog
+from app.main import app
+from app.core.database import Base, SessionLocal, engine, async_engine
+from app.core.security import create_access_token
+from app.models import Usuario, RolUsuario, Cliente
+
+DB_LATENCY_MS = 5
+CONCURRENCY = 32
+REQUESTS = 400
+
+def add_latency():
+    demora = DB_LATENCY_MS / 1000
+
+    def trace(statement):
+        time.sleep(demora)
+
+    @event.listens_for(engine, "connect")
+    def sync_connect(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(trace)
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def async_connect(dbapi_connection, connection_record):
+        dbapi_connection.await_(dbapi_connection._connection.set_trace_callback(trace))
+
+def seed() -> str:
+    # The throwaway database matches the models, no migrations needed
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    farmacia_id, _ = seed_catalog(db, 200)
+    usuario = Usuario(
+        farmacia_id=farmacia_id,
+        username="loadtest",
+        email="loadtest@bench.local",
+        password_hash="x",
+        nombre_completo="Load Test",
+        rol=RolUsuario.ADMINISTRADOR
+    )
+    db.add(usuario)
+    db.add_all([Cliente(farmacia_id=farmacia_id, nombre=f"Cliente {i}") for i in range(200)])
+    db.commit()
+    token = create_access_token(data={"sub": str(usuario.id), "farmacia_id": str(farmacia_id)})
+    db.close()
+    return token
+
+def start_server() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+async def run(base_url: str, path: str, token: str) -> tuple:
+    latencias = []
+    pendientes = iter(range(REQUESTS))
+
+    async with httpx.AsyncClient(base_url=base_url, headers={"Authorization": f"Bearer {token}"}, timeout=60) as client:
+        await client.get(path)  # warm up auth cache and connections
+
+        async def cliente():
+            for _ in pendientes:
+                start = time.perf_counter()
+                r = await client.get(path)
+                r.raise_for_status()
+                latencias.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(cliente() for _ in range(CONCURRENCY)))
+        total = time.perf_counter() - start
+
+    latencias.sort()
+    return REQUESTS / total, statistics.median(latencias), latencias[int(len(latencias) * 0.95)]
+
+def main():
+    token = seed()
+    add_latency()
+    base_url = start_server()
+
+    print(f"1 worker, {CONCURRENCY} concurrent clients, {DB_LATENCY_MS} ms per SQL statement")
+    print(f"{'route':<34} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for nombre, path in [
+        ("GET /api/clientes (Session)", "/api/clientes?limit=20"),
+        ("GET /api/medicamentos (Async)", "/api/medicamentos?limit=20"),
+    ]:
+        rps, p50, p95 = asyncio.run(run(base_url, path, token))
+        print(f"{nombre:<34} {rps:>8.1f} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f}")
+
+if __name__ == "__main__":
+    main()
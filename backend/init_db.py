@@ -9,15 +9,23 @@ from decimal import Decimal
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.core.database import SessionLocal, engine, Base
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from app.core.database import SessionLocal, engine
 from app.models import *
 from app.core.security import get_password_hash
 
 def init_db():
     """Initialize database with sample data"""
     
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+    # Create or upgrade the schema
+    config = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+    tablas = inspect(engine).get_table_names()
+    if "farmacias" in tablas and "alembic_version" not in tablas:
+        # Created by create_all before migrations: it has the baseline schema
+        command.stamp(config, "0001")
+    command.upgrade(config, "head")
     
     db = SessionLocal()
     
@@ -0,0 +1,43 @@
+"""
+Script to backfill or rebuild the daily sales rollups from ventas/detalle_ventas.
+
+Usage:
+    python rebuild_rollups.py                      # all pharmacies, full history
+    python rebuild_rollups.py --farmacia <uuid>    # one pharmacy
+    python rebuild_rollups.py --desde 2026-01-01   # only days from that date on
+"""
+import sys
+import os
+import argparse
+import uuid
+from datetime import date
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.models import *
+from app.services.rollup import rebuild_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild daily sales rollups")
+    parser.add_argument("--farmacia", type=uuid.UUID, default=None, help="Pharmacy id (default: all)")
+    parser.add_argument("--desde", type=date.fromisoformat, default=None, help="First day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db, farmacia_id=args.farmacia, desde=args.desde)
+        db.commit()
+        dias = db.query(ResumenVentasDia).count()
+        filas = db.query(ResumenVentasMedicamento).count()
+        print(f"✓ Rollups rebuilt: {dias} pharmacy-days, {filas} pharmacy-day-medication rows")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()